@@ -16,10 +16,16 @@ MCP图像识别系统 - 配置管理模块
 版本：1.0.0
 """
 
+import logging
 import os
+from functools import lru_cache
 from typing import Optional, List
+from pydantic import PrivateAttr, model_validator
 from pydantic_settings import BaseSettings
 
+# logging_config依赖本模块，这里直接使用标准库获取日志记录器（挂在api_server根日志记录器下）
+logger = logging.getLogger(__name__)
+
 class Settings(BaseSettings):
     """
     系统配置类
@@ -54,12 +60,17 @@ class Settings(BaseSettings):
     LOCAL_AI_MODEL: str = "qwen3:1.7b"                 # 本地AI模型名称
     LOCAL_AI_BASE_URL: str = "http://localhost:11434"  # Ollama服务地址
     AI_TIMEOUT: int = 60                                # AI处理超时时间（秒）
+    LOCAL_AI_CACHE_ENABLED: bool = True                 # 是否启用AI响应缓存（相同提示词复用结果）
+    LOCAL_AI_CACHE_SIZE: int = 10000                    # AI响应缓存最大条数
+    LOCAL_AI_CACHE_TTL: int = 3600                      # AI响应缓存有效期（秒）
     
     # ==================== 图像识别配置 ====================
     # 当前使用Mock实现，未来可扩展为真实的图像识别服务
     USE_MOCK_VISION: bool = True        # 是否使用Mock图像识别
     VISION_MODEL_TYPE: str = "mock"     # 图像识别模型类型
     VISION_CONFIDENCE_THRESHOLD: float = 0.8  # 识别置信度阈值
+    MOCK_VISION_SIMULATE_LATENCY: bool = False  # Mock识别是否模拟随机处理延迟
+    MOCK_VISION_FIXED_LATENCY: float = 0.0      # Mock识别固定延迟（秒），大于0时优先使用，便于压测复现
     
     # ==================== 简道云配置 ====================
     # 重要：这些配置仅供MCP服务器使用，API服务器不直接使用
@@ -78,13 +89,49 @@ class Settings(BaseSettings):
 
     # ==================== 性能配置 ====================
     MAX_CONCURRENT_REQUESTS: int = 10  # 最大并发请求数，控制系统负载
+    MAX_BATCH_SIZE: int = 100          # 单次批量处理允许的最大记录数
     REQUEST_TIMEOUT: int = 300         # 请求超时时间（秒），防止长时间阻塞
+    RESULT_CACHE_ENABLED: bool = True  # 是否缓存识别和AI处理结果（相同源文本直接复用）
+    RESULT_CACHE_SIZE: int = 1024      # 处理结果缓存最大条数
+    RESULT_CACHE_TTL: int = 3600       # 处理结果缓存有效期（秒）
     
     # ==================== 日志配置 ====================
     LOG_LEVEL: str = "INFO"                    # 日志级别
     LOG_FILE: str = "logs/api_server.log"      # 日志文件路径
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"  # 日志格式
     
+    # 配置校验结果，在实例构造时计算一次，由validate_settings()读取
+    _validation_errors: List[str] = PrivateAttr(default_factory=list)
+    
+    @model_validator(mode="after")
+    def _collect_validation_errors(self) -> "Settings":
+        """
+        构造配置实例时执行一次配置检查
+        
+        只收集错误而不抛出异常，使导入和读取配置不受影响；
+        是否因配置错误中止启动由validate_settings()决定。
+        """
+        errors = []
+        
+        # 验证MCP服务器路径（核心组件）
+        if not os.path.exists(self.MCP_SERVER_PATH):
+            errors.append(f"MCP服务器文件不存在: {self.MCP_SERVER_PATH}")
+        
+        # 验证AI模型配置
+        if self.USE_LOCAL_AI and not self.LOCAL_AI_BASE_URL:
+            errors.append("启用本地AI时必须配置LOCAL_AI_BASE_URL")
+        
+        # 验证简道云配置（当前系统必需）
+        if not self.JIANDAOYUN_API_KEY:
+            errors.append("简道云API密钥未配置")
+        if not self.JIANDAOYUN_APP_ID:
+            errors.append("简道云应用ID未配置")
+        if not self.JIANDAOYUN_ENTRY_ID:
+            errors.append("简道云表单ID未配置")
+        
+        self._validation_errors = errors
+        return self
+    
     class Config:
         """Pydantic配置类"""
         env_file = ".env"              # 从.env文件加载环境变量
@@ -92,17 +139,32 @@ class Settings(BaseSettings):
         case_sensitive = True          # 环境变量名大小写敏感
 
 # ==================== 全局配置实例 ====================
-# 创建全局配置实例，整个应用程序共享使用
-settings = Settings()
+# 配置实例在首次使用时创建并缓存，整个应用程序共享使用。
+# 导入本模块不会触发.env解析和Pydantic校验。
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """
     获取配置实例
     
+    首次调用时解析环境变量和.env文件，之后返回缓存的实例。
+    测试中可以通过 get_settings.cache_clear() 重新加载配置。
+    
     Returns:
         Settings: 配置实例
     """
-    return settings
+    return Settings()
+
+def __getattr__(name: str):
+    """
+    模块级属性钩子
+    
+    兼容旧的 `from api_server.config.settings import settings` 写法，
+    在首次访问时才创建配置实例。
+    """
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def validate_settings() -> bool:
     """
@@ -110,6 +172,7 @@ def validate_settings() -> bool:
 
     检查必要的配置项是否正确设置，确保系统能够正常运行。
     主要验证MCP服务器路径和AI模型配置。
+    实际检查在配置实例构造时完成，这里只读取缓存的检查结果。
 
     Returns:
         bool: 配置是否有效
@@ -117,29 +180,19 @@ def validate_settings() -> bool:
     Raises:
         ValueError: 配置无效时抛出异常
     """
-    errors = []
-
-    # 验证MCP服务器路径（核心组件）
-    if not os.path.exists(settings.MCP_SERVER_PATH):
-        errors.append(f"MCP服务器文件不存在: {settings.MCP_SERVER_PATH}")
-
-    # 验证AI模型配置
-    if settings.USE_LOCAL_AI and not settings.LOCAL_AI_BASE_URL:
-        errors.append("启用本地AI时必须配置LOCAL_AI_BASE_URL")
-
-    # 验证简道云配置（当前系统必需）
-    if not settings.JIANDAOYUN_API_KEY:
-        errors.append("简道云API密钥未配置")
-    if not settings.JIANDAOYUN_APP_ID:
-        errors.append("简道云应用ID未配置")
-    if not settings.JIANDAOYUN_ENTRY_ID:
-        errors.append("简道云表单ID未配置")
+    errors = get_settings()._validation_errors
 
     if errors:
         raise ValueError(f"配置验证失败: {'; '.join(errors)}")
 
     return True
 
+# ==================== 运行环境 ====================
+# 运行环境在进程生命周期内不会变化，模块导入时解析一次
+ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+IS_DEVELOPMENT: bool = ENVIRONMENT == "development"
+IS_PRODUCTION: bool = ENVIRONMENT == "production"
+
 def get_environment() -> str:
     """
     获取当前运行环境
@@ -147,7 +200,7 @@ def get_environment() -> str:
     Returns:
         str: 环境名称 (development/production/testing)
     """
-    return os.getenv("ENVIRONMENT", "development")
+    return ENVIRONMENT
 
 def is_development() -> bool:
     """
@@ -156,7 +209,7 @@ def is_development() -> bool:
     Returns:
         bool: 是否为开发环境
     """
-    return get_environment() == "development"
+    return IS_DEVELOPMENT
 
 def is_production() -> bool:
     """
@@ -165,18 +218,20 @@ def is_production() -> bool:
     Returns:
         bool: 是否为生产环境
     """
-    return get_environment() == "production"
+    return IS_PRODUCTION
 
 def print_config_summary():
     """
-    打印配置摘要信息
+    输出配置摘要信息
     
     用于启动时显示关键配置信息，便于调试和确认配置正确性。
+    通过日志记录器输出，与其他启动日志一样经由日志队列写入控制台和日志文件。
     """
-    print(f"🔧 {settings.APP_NAME} v{settings.APP_VERSION}")
-    print(f"🌐 服务地址: http://{settings.HOST}:{settings.PORT}")
-    print(f"🤖 AI模型: {settings.LOCAL_AI_MODEL} @ {settings.LOCAL_AI_BASE_URL}")
-    print(f"📡 MCP服务器: {settings.MCP_SERVER_PATH}")
-    print(f"👁️ 图像识别: {'Mock模式' if settings.USE_MOCK_VISION else '真实模式'}")
-    print(f"🔍 环境: {get_environment()}")
-    print(f"🐛 调试模式: {'开启' if settings.DEBUG else '关闭'}")
+    settings = get_settings()
+    logger.info("🔧 %s v%s", settings.APP_NAME, settings.APP_VERSION)
+    logger.info("🌐 服务地址: http://%s:%s", settings.HOST, settings.PORT)
+    logger.info("🤖 AI模型: %s @ %s", settings.LOCAL_AI_MODEL, settings.LOCAL_AI_BASE_URL)
+    logger.info("📡 MCP服务器: %s", settings.MCP_SERVER_PATH)
+    logger.info("👁️ 图像识别: %s", 'Mock模式' if settings.USE_MOCK_VISION else '真实模式')
+    logger.info("🔍 环境: %s", ENVIRONMENT)
+    logger.info("🐛 调试模式: %s", '开启' if settings.DEBUG else '关闭')
@@ -23,19 +23,25 @@ MCP图像识别系统 - 主应用程序
 """
 
 import asyncio
+import sys
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
-from api_server.config.settings import settings, validate_settings, print_config_summary
+from api_server.config.settings import get_settings, validate_settings, print_config_summary
 from api_server.models.models import (
     ProcessRecordRequest, BatchProcessRequest, APIResponse, 
     HealthCheckResponse, ToolsResponse
 )
-from api_server.services.ai_processor import ai_processor_service
-from api_server.services.mcp_client import mcp_client_service
+from api_server.providers.local_ai_provider import get_local_ai_provider
+from api_server.services.ai_processor import get_ai_processor_service
+from api_server.services.mcp_client import get_mcp_client_service
+from api_server.utils.logging_config import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger(__name__)
 
 # ==================== 应用生命周期管理 ====================
 
@@ -47,53 +53,71 @@ async def lifespan(app: FastAPI):
     在应用启动和关闭时执行必要的初始化和清理工作。
     """
     # 启动时的初始化工作
-    print("🚀 启动简道云AI处理服务...")
+    setup_logging()
+    logger.info("🚀 启动简道云AI处理服务...")
     
     try:
         # 验证配置
         validate_settings()
-        print("✅ 配置验证通过")
+        logger.info("✅ 配置验证通过")
         
         # 打印配置摘要
         print_config_summary()
         
-        # 健康检查（尝试建立MCP连接）
-        print("🔗 健康检查时尝试建立MCP连接...")
-        health_result = await ai_processor_service.health_check()
+        # 健康检查（尝试建立MCP连接），限制最长等待时间，避免探测挂起阻塞启动
+        logger.info("🔗 健康检查时尝试建立MCP连接...")
+        startup_timeout = get_settings().MCP_SERVER_TIMEOUT
+        try:
+            health_result = await asyncio.wait_for(
+                get_ai_processor_service().health_check(),
+                timeout=startup_timeout
+            )
+        except asyncio.TimeoutError:
+            health_result = {
+                "overall_status": "unhealthy",
+                "services": {
+                    "startup": {"status": "unhealthy", "error": f"健康检查超时 (>{startup_timeout}秒)"}
+                }
+            }
         
         if health_result.get("overall_status") == "healthy":
-            print("🔍 服务健康检查: healthy")
+            logger.info("🔍 服务健康检查: healthy")
         else:
-            print("🔍 服务健康检查: unhealthy")
-            print("⚠️ 部分服务不健康，但继续启动...")
+            logger.warning("🔍 服务健康检查: unhealthy")
+            logger.warning("⚠️ 部分服务不健康，但继续启动...")
             for service_name, service_health in health_result.get("services", {}).items():
                 if service_health.get("status") != "healthy":
                     error_msg = service_health.get("error", "未知错误")
-                    print(f"   - {service_name}: {error_msg}")
+                    logger.warning("   - %s: %s", service_name, error_msg)
         
-        print("🎉 服务启动完成!")
+        logger.info("🎉 服务启动完成!")
         
         yield  # 应用运行期间
         
     except Exception as e:
-        print(f"❌ 服务启动失败: {e}")
+        logger.error("❌ 服务启动失败: %s", e)
+        shutdown_logging()
         raise
     
     # 关闭时的清理工作
-    print("🔚 正在关闭服务...")
+    logger.info("🔚 正在关闭服务...")
     try:
-        # 这里可以添加清理逻辑
-        pass
+        # 关闭本地AI提供者的HTTP连接池和共享的MCP连接
+        await get_local_ai_provider().aclose()
+        await get_mcp_client_service().aclose()
     except Exception as e:
-        print(f"⚠️ 服务关闭时出错: {e}")
+        logger.warning("⚠️ 服务关闭时出错: %s", e)
+    finally:
+        shutdown_logging()
 
 # ==================== FastAPI应用创建 ====================
 
 app = FastAPI(
-    title=settings.APP_NAME,
-    description=settings.APP_DESCRIPTION,
-    version=settings.APP_VERSION,
+    title=get_settings().APP_NAME,
+    description=get_settings().APP_DESCRIPTION,
+    version=get_settings().APP_VERSION,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # 使用orjson序列化响应，原生支持datetime/Enum
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -103,7 +127,7 @@ app = FastAPI(
 # CORS中间件配置
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=get_settings().CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -123,24 +147,44 @@ async def global_exception_handler(request, exc):
         message="服务器内部错误",
         error=str(exc)
     )
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
-        content=error_response.model_dump()
+        content=error_response.model_dump(mode="json")
     )
 
+def _json_response(response: BaseModel) -> ORJSONResponse:
+    """
+    直接返回序列化好的响应
+    
+    由Pydantic一次性把整个响应树转换为JSON原生类型，再交给orjson编码。
+    返回Response对象可以跳过FastAPI的jsonable_encoder二次遍历。
+    
+    Args:
+        response: 响应模型实例
+        
+    Returns:
+        ORJSONResponse: JSON响应
+    """
+    return ORJSONResponse(content=response.model_dump(mode="json"))
+
 # ==================== API接口不需要密钥验证 ====================
 # 注意：简道云API密钥仅用于MCP服务器调用简道云API，不用于验证客户端请求
 
 # ==================== 核心API路由 ====================
+# 响应数据均由服务内部构造，字段已知合法：
+# - 使用model_construct()创建响应模型，跳过字段校验
+# - 路由设置response_model=None，避免FastAPI对返回值再做一次校验
+# - 通过responses参数保留OpenAPI文档中的响应模型
 
-@app.get("/", response_model=APIResponse)
+@app.get("/", response_model=None, responses={200: {"model": APIResponse}})
 async def root():
     """
     根路径接口
     
     返回系统基本信息。
     """
-    return APIResponse(
+    settings = get_settings()
+    return APIResponse.model_construct(
         success=True,
         message=f"欢迎使用{settings.APP_NAME}",
         data={
@@ -151,7 +195,7 @@ async def root():
         }
     )
 
-@app.get("/health", response_model=HealthCheckResponse)
+@app.get("/health", response_model=None, responses={200: {"model": HealthCheckResponse}})
 async def health_check():
     """
     健康检查接口
@@ -162,21 +206,21 @@ async def health_check():
     - 图像识别服务状态
     """
     try:
-        health_result = await ai_processor_service.health_check()
+        health_result = await get_ai_processor_service().health_check()
         
-        return HealthCheckResponse(
+        return HealthCheckResponse.model_construct(
             overall_status=health_result.get("overall_status", "unhealthy"),
             services=health_result.get("services", {}),
             model_info=health_result.get("model_info", {})
         )
     except Exception as e:
-        return HealthCheckResponse(
+        return HealthCheckResponse.model_construct(
             overall_status="unhealthy",
             services={"error": {"status": "unhealthy", "error": str(e)}},
             model_info={}
         )
 
-@app.get("/api/tools", response_model=ToolsResponse)
+@app.get("/api/tools", response_model=None, responses={200: {"model": ToolsResponse}})
 async def get_tools():
     """
     获取MCP工具列表接口
@@ -184,11 +228,11 @@ async def get_tools():
     查询MCP服务器提供的所有工具，用于调试和验证MCP连接。
     """
     try:
-        tools_result = await mcp_client_service.get_tools()
+        tools_result = await get_mcp_client_service().get_tools()
         
         if tools_result.get("success"):
             tools = tools_result.get("tools", [])
-            return ToolsResponse(
+            return ToolsResponse.model_construct(
                 success=True,
                 tools=tools,
                 count=len(tools)
@@ -201,7 +245,7 @@ async def get_tools():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取工具列表失败: {str(e)}")
 
-@app.post("/api/process-record", response_model=APIResponse)
+@app.post("/api/process-record", response_model=None, responses={200: {"model": APIResponse}})
 async def process_record(request: ProcessRecordRequest):
     """
     处理单个记录接口
@@ -216,62 +260,77 @@ async def process_record(request: ProcessRecordRequest):
         request: 处理请求参数
     """
     try:
-        print(f"📥 收到处理请求: {request.record_id}")
+        logger.info("收到处理请求: %s", request.record_id)
         
         # 执行AI处理流程
-        result = await ai_processor_service.process_record(
+        result = await get_ai_processor_service().process_record(
             record_id=request.record_id,
             force_reprocess=request.force_reprocess
         )
         
         if result.success:
-            print(f"📤 处理完成: {request.record_id} - 成功")
-            return APIResponse(
+            logger.info("处理完成: %s - 成功", request.record_id)
+            return _json_response(APIResponse.model_construct(
                 success=True,
                 message="记录处理成功",
-                data=result.model_dump()
-            )
+                data=result
+            ))
         else:
-            print(f"📤 处理完成: {request.record_id} - 失败")
-            return APIResponse(
+            logger.info("处理完成: %s - 失败", request.record_id)
+            return _json_response(APIResponse.model_construct(
                 success=False,
                 message="记录处理失败",
                 error=result.error_message,
-                data=result.model_dump()
-            )
+                data=result
+            ))
             
     except Exception as e:
-        print(f"❌ 处理请求异常: {e}")
+        logger.error("处理请求异常: %s", e)
         raise HTTPException(status_code=500, detail=f"处理失败: {str(e)}")
 
-@app.post("/api/batch-process", response_model=APIResponse)
+@app.post("/api/batch-process", response_model=None, responses={200: {"model": APIResponse}})
 async def batch_process(request: BatchProcessRequest):
     """
     批量处理记录接口
 
     并发处理多个记录，控制并发数量以避免系统过载。
+    单次请求的记录数受MAX_BATCH_SIZE限制。
 
     Args:
         request: 批量处理请求参数
     """
+    max_batch_size = get_settings().MAX_BATCH_SIZE
+    if len(request.record_ids) > max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"批量处理记录数超过上限: {len(request.record_ids)} > {max_batch_size}"
+        )
+    
     try:
-        print(f"📥 收到批量处理请求: {len(request.record_ids)} 条记录")
+        logger.info("收到批量处理请求: %d 条记录", len(request.record_ids))
         
         # 执行批量AI处理
-        result = await ai_processor_service.batch_process(
-            record_ids=request.record_ids
+        result = await get_ai_processor_service().batch_process(
+            record_ids=request.record_ids,
+            force_reprocess=request.force_reprocess
         )
         
-        print(f"📤 批量处理完成: 成功 {result.get('success_count', 0)}, 失败 {result.get('failed_count', 0)}")
+        logger.info(
+            "批量处理完成: 成功 %s, 失败 %s, 跳过 %s",
+            result.get('success_count', 0), result.get('failed_count', 0), result.get('skipped_count', 0)
+        )
         
-        return APIResponse(
+        return _json_response(APIResponse.model_construct(
             success=True,
-            message=f"批量处理完成: 成功 {result.get('success_count', 0)}, 失败 {result.get('failed_count', 0)}",
+            message=(
+                f"批量处理完成: 成功 {result.get('success_count', 0)}, 失败 {result.get('failed_count', 0)}, "
+                f"跳过 {result.get('skipped_count', 0)}"
+            ),
             data=result
-        )
+        ))
         
     except Exception as e:
-        print(f"❌ 批量处理请求异常: {e}")
+        logger.error("批量处理请求异常: %s", e)
         raise HTTPException(status_code=500, detail=f"批量处理失败: {str(e)}")
 
 # ==================== 服务启动函数 ====================
@@ -283,10 +342,18 @@ def start_server():
     使用Uvicorn启动FastAPI应用。
     注意：禁用reload模式以确保MCP连接稳定性。
     """
+    settings = get_settings()
+    # 启动前的日志也经由日志队列输出（lifespan中再次调用不会重复安装）
+    setup_logging()
+
     # 设置Windows兼容的事件循环策略
     if hasattr(asyncio, 'WindowsProactorEventLoopPolicy'):
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        print("🔧 已设置Windows ProactorEventLoop策略")
+        logger.info("🔧 已设置Windows ProactorEventLoop策略")
+    
+    # 非Windows平台使用uvloop事件循环和httptools HTTP解析器（由uvicorn[standard]提供）
+    # Windows平台保持上面设置的ProactorEventLoop
+    server_options = {} if sys.platform == "win32" else {"loop": "uvloop", "http": "httptools"}
     
     # 启动服务器（禁用reload模式以确保MCP连接稳定）
     uvicorn.run(
@@ -294,7 +361,8 @@ def start_server():
         host=settings.HOST,
         port=settings.PORT,
         reload=False,  # 禁用reload模式，确保MCP连接稳定
-        log_level="info"
+        log_level="info",
+        **server_options
     )
 
 if __name__ == "__main__":
@@ -5,86 +5,132 @@ Mock图片识别服务
 
 import random
 import asyncio
+import re
+import time
 from datetime import datetime
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Tuple
+from api_server.config.settings import get_settings
 from api_server.models.response_models import VisionResult, VisionResultType
 
+# Mock结果版本号
+MOCK_VERSION = "1.0.0"
+
+# 热路径中比较用的识别类型常量，避免每次调用都经过Enum类属性查找
+_TEXT_RECOGNITION = VisionResultType.TEXT_RECOGNITION
+_OBJECT_DETECTION = VisionResultType.OBJECT_DETECTION
+
+# ==================== Mock结果模板 ====================
+# 模板是只读常量，模块加载时构建一次，所有实例共享。
+# 使用MappingProxyType冻结，任何对模板的意外修改都会立即抛出TypeError。
+
+def _freeze_mock_result(result: Dict[str, Any]) -> Mapping[str, Any]:
+    """将Mock结果模板冻结为只读映射"""
+    details = dict(result["details"])
+    if "objects" in details:
+        details["objects"] = tuple(MappingProxyType(obj) for obj in details["objects"])
+    return MappingProxyType({**result, "details": MappingProxyType(details)})
+
+_MOCK_RESULTS: Tuple[Mapping[str, Any], ...] = tuple(
+    _freeze_mock_result(result) for result in [
+        {
+            "type": VisionResultType.TEXT_RECOGNITION,
+            "content": "身份证号码: 123456789012345678\n姓名: 张三\n性别: 男",
+            "confidence": 0.95,
+            "details": {
+                "detected_text_count": 3,
+                "language": "zh",
+                "document_type": "id_card"
+            }
+        },
+        {
+            "type": VisionResultType.TEXT_RECOGNITION,
+            "content": "合同编号: HT2025001\n甲方: ABC公司\n乙方: XYZ公司\n签署日期: 2025-06-05",
+            "confidence": 0.88,
+            "details": {
+                "detected_text_count": 4,
+                "language": "zh",
+                "document_type": "contract"
+            }
+        },
+        {
+            "type": VisionResultType.OBJECT_DETECTION,
+            "content": "检测到物体: 汽车(2辆), 人员(3人), 建筑物(1栋), 交通标志(2个)",
+            "confidence": 0.92,
+            "details": {
+                "objects": [
+                    {"name": "汽车", "count": 2, "confidence": 0.95},
+                    {"name": "人员", "count": 3, "confidence": 0.89},
+                    {"name": "建筑物", "count": 1, "confidence": 0.97},
+                    {"name": "交通标志", "count": 2, "confidence": 0.85}
+                ]
+            }
+        },
+        {
+            "type": VisionResultType.DOCUMENT_ANALYSIS,
+            "content": "文档类型: 发票\n发票号码: INV2025001\n金额: ¥1,234.56\n开票日期: 2025-06-05",
+            "confidence": 0.91,
+            "details": {
+                "document_type": "invoice",
+                "fields_extracted": 4,
+                "currency": "CNY",
+                "amount": 1234.56
+            }
+        },
+        {
+            "type": VisionResultType.TEXT_RECOGNITION,
+            "content": "产品名称: 智能手机\n型号: ABC-123\n序列号: SN123456789\n生产日期: 2025-05-15",
+            "confidence": 0.87,
+            "details": {
+                "detected_text_count": 4,
+                "language": "zh",
+                "document_type": "product_label"
+            }
+        },
+        {
+            "type": VisionResultType.FACE_RECOGNITION,
+            "content": "检测到人脸: 1个\n年龄估计: 25-35岁\n性别: 男性\n表情: 微笑",
+            "confidence": 0.83,
+            "details": {
+                "face_count": 1,
+                "age_range": [25, 35],
+                "gender": "male",
+                "emotion": "smile",
+                "face_quality": "good"
+            }
+        }
+    ]
+)
+
+# ==================== 关键词分派表 ====================
+# 关键词分组，顺序与_MOCK_RESULTS下标一致，靠前的分组优先级更高
+_KEYWORD_GROUPS = (
+    ("身份证", "id", "证件"),            # 身份证识别
+    ("合同", "contract", "协议"),        # 合同识别
+    ("车辆", "汽车", "交通", "监控"),     # 物体检测
+    ("发票", "invoice", "票据"),         # 发票识别
+    ("产品", "标签", "序列号"),           # 产品标签
+    ("人脸", "face", "人员"),            # 人脸识别
+)
+
+# 所有关键词编译为一个正则，每个分组对应一个命名组g<下标>。
+# 使用IGNORECASE匹配，无需对源文本调用lower()生成新字符串。
+_KEYWORD_PATTERN = re.compile(
+    "|".join(
+        f"(?P<g{index}>{'|'.join(map(re.escape, keywords))})"
+        for index, keywords in enumerate(_KEYWORD_GROUPS)
+    ),
+    re.IGNORECASE
+)
+_GROUP_TO_INDEX = {f"g{index}": index for index in range(len(_KEYWORD_GROUPS))}
+
 class MockVisionProvider:
     """Mock图片识别提供者"""
     
     def __init__(self):
-        self.mock_results = self._init_mock_results()
-    
-    def _init_mock_results(self) -> list:
-        """初始化Mock结果数据"""
-        return [
-            {
-                "type": VisionResultType.TEXT_RECOGNITION,
-                "content": "身份证号码: 123456789012345678\n姓名: 张三\n性别: 男",
-                "confidence": 0.95,
-                "details": {
-                    "detected_text_count": 3,
-                    "language": "zh",
-                    "document_type": "id_card"
-                }
-            },
-            {
-                "type": VisionResultType.TEXT_RECOGNITION,
-                "content": "合同编号: HT2025001\n甲方: ABC公司\n乙方: XYZ公司\n签署日期: 2025-06-05",
-                "confidence": 0.88,
-                "details": {
-                    "detected_text_count": 4,
-                    "language": "zh",
-                    "document_type": "contract"
-                }
-            },
-            {
-                "type": VisionResultType.OBJECT_DETECTION,
-                "content": "检测到物体: 汽车(2辆), 人员(3人), 建筑物(1栋), 交通标志(2个)",
-                "confidence": 0.92,
-                "details": {
-                    "objects": [
-                        {"name": "汽车", "count": 2, "confidence": 0.95},
-                        {"name": "人员", "count": 3, "confidence": 0.89},
-                        {"name": "建筑物", "count": 1, "confidence": 0.97},
-                        {"name": "交通标志", "count": 2, "confidence": 0.85}
-                    ]
-                }
-            },
-            {
-                "type": VisionResultType.DOCUMENT_ANALYSIS,
-                "content": "文档类型: 发票\n发票号码: INV2025001\n金额: ¥1,234.56\n开票日期: 2025-06-05",
-                "confidence": 0.91,
-                "details": {
-                    "document_type": "invoice",
-                    "fields_extracted": 4,
-                    "currency": "CNY",
-                    "amount": 1234.56
-                }
-            },
-            {
-                "type": VisionResultType.TEXT_RECOGNITION,
-                "content": "产品名称: 智能手机\n型号: ABC-123\n序列号: SN123456789\n生产日期: 2025-05-15",
-                "confidence": 0.87,
-                "details": {
-                    "detected_text_count": 4,
-                    "language": "zh",
-                    "document_type": "product_label"
-                }
-            },
-            {
-                "type": VisionResultType.FACE_RECOGNITION,
-                "content": "检测到人脸: 1个\n年龄估计: 25-35岁\n性别: 男性\n表情: 微笑",
-                "confidence": 0.83,
-                "details": {
-                    "face_count": 1,
-                    "age_range": [25, 35],
-                    "gender": "male",
-                    "emotion": "smile",
-                    "face_quality": "good"
-                }
-            }
-        ]
+        self.mock_results = _MOCK_RESULTS
+        # 实例独享的随机数生成器，不与全局random模块共享状态
+        self._rng = random.Random()
     
     async def recognize(self, record_data: Dict[str, Any]) -> VisionResult:
         """
@@ -96,15 +142,29 @@ class MockVisionProvider:
         Returns:
             VisionResult: 识别结果
         """
-        # 模拟处理时间
-        processing_time = random.uniform(0.5, 2.0)
-        await asyncio.sleep(processing_time)
+        start_time = time.perf_counter()
+        rng = self._rng
+        
+        # 模拟处理时间（默认关闭，避免压测和CI中被sleep拖慢吞吐）
+        settings = get_settings()
+        if settings.MOCK_VISION_FIXED_LATENCY > 0:
+            await asyncio.sleep(settings.MOCK_VISION_FIXED_LATENCY)
+        elif settings.MOCK_VISION_SIMULATE_LATENCY:
+            await asyncio.sleep(rng.uniform(0.5, 2.0))
         
         # 根据输入数据选择合适的Mock结果
         mock_result = self._select_mock_result(record_data)
         
-        # 添加一些随机性
-        mock_result = self._add_randomness(mock_result)
+        # 添加一些随机性（固定次数的随机数在这里一次取出）
+        mock_result = self._add_randomness(
+            mock_result,
+            confidence_delta=rng.uniform(-0.05, 0.05),  # 随机调整置信度 (±0.05)
+            add_quality_note=rng.random() < 0.3,        # 30%概率添加额外信息
+            good_quality=rng.random() > 0.5
+        )
+        
+        # 使用实际测量的处理耗时
+        processing_time = time.perf_counter() - start_time
         
         return VisionResult(
             type=mock_result["type"],
@@ -114,55 +174,73 @@ class MockVisionProvider:
             processing_time=processing_time
         )
     
-    def _select_mock_result(self, record_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _select_mock_result(self, record_data: Dict[str, Any]) -> Mapping[str, Any]:
         """根据输入数据选择合适的Mock结果"""
         
-        source_text = record_data.get("source_text", "").lower()
-        
-        # 根据源文本内容智能选择Mock结果
-        if any(keyword in source_text for keyword in ["身份证", "id", "证件"]):
-            return self.mock_results[0]  # 身份证识别
-        elif any(keyword in source_text for keyword in ["合同", "contract", "协议"]):
-            return self.mock_results[1]  # 合同识别
-        elif any(keyword in source_text for keyword in ["车辆", "汽车", "交通", "监控"]):
-            return self.mock_results[2]  # 物体检测
-        elif any(keyword in source_text for keyword in ["发票", "invoice", "票据"]):
-            return self.mock_results[3]  # 发票识别
-        elif any(keyword in source_text for keyword in ["产品", "标签", "序列号"]):
-            return self.mock_results[4]  # 产品标签
-        elif any(keyword in source_text for keyword in ["人脸", "face", "人员"]):
-            return self.mock_results[5]  # 人脸识别
-        else:
-            # 随机选择一个结果
-            return random.choice(self.mock_results)
+        source_text = record_data.get("source_text", "")
+        
+        # 单次扫描源文本，命中多个分组时取优先级最高（下标最小）的分组
+        matched = [
+            _GROUP_TO_INDEX[match.lastgroup]
+            for match in _KEYWORD_PATTERN.finditer(source_text)
+        ]
+        if matched:
+            return self.mock_results[min(matched)]
+        
+        # 随机选择一个结果
+        return self._rng.choice(self.mock_results)
     
-    def _add_randomness(self, mock_result: Dict[str, Any]) -> Dict[str, Any]:
-        """为Mock结果添加随机性"""
+    def _add_randomness(
+        self,
+        mock_result: Mapping[str, Any],
+        confidence_delta: float,
+        add_quality_note: bool,
+        good_quality: bool
+    ) -> Dict[str, Any]:
+        """
+        为Mock结果添加随机性
         
-        result = mock_result.copy()
+        总是构造新的结果字典，模板本身是只读的。
+        details只做浅拷贝，objects中的只读元素复制为普通字典。
         
-        # 随机调整置信度 (±0.05)
-        confidence_delta = random.uniform(-0.05, 0.05)
-        result["confidence"] = max(0.1, min(1.0, result["confidence"] + confidence_delta))
+        Args:
+            mock_result: Mock结果模板
+            confidence_delta: 置信度调整量
+            add_quality_note: 是否追加图片质量备注（仅文字识别）
+            good_quality: 备注中的图片质量是否为"良好"
+        """
+        
+        confidence = max(0.1, min(1.0, mock_result["confidence"] + confidence_delta))
+        
+        content = mock_result["content"]
+        details = {
+            **mock_result["details"],
+            "processed_at": datetime.now().isoformat(),  # 添加处理时间戳
+            "mock_version": MOCK_VERSION
+        }
         
         # 为某些类型添加随机变化
-        if result["type"] == VisionResultType.TEXT_RECOGNITION:
+        if mock_result["type"] == _TEXT_RECOGNITION:
             # 随机添加一些变化
-            if random.random() < 0.3:  # 30%概率添加额外信息
-                result["content"] += f"\n备注: 图片质量{'良好' if random.random() > 0.5 else '一般'}"
-        
-        elif result["type"] == VisionResultType.OBJECT_DETECTION:
-            # 随机调整检测到的物体数量
-            if "objects" in result["details"]:
-                for obj in result["details"]["objects"]:
-                    if random.random() < 0.2:  # 20%概率调整数量
-                        obj["count"] = max(1, obj["count"] + random.randint(-1, 1))
+            if add_quality_note:
+                content += f"\n备注: 图片质量{'良好' if good_quality else '一般'}"
         
-        # 添加处理时间戳
-        result["details"]["processed_at"] = datetime.now().isoformat()
-        result["details"]["mock_version"] = "1.0.0"
+        elif mock_result["type"] == _OBJECT_DETECTION:
+            # 随机调整检测到的物体数量（20%概率），被调整的物体使用新字典
+            if "objects" in details:
+                rng = self._rng
+                details["objects"] = [
+                    {**obj, "count": max(1, obj["count"] + rng.randint(-1, 1))}
+                    if rng.random() < 0.2 else dict(obj)
+                    for obj in details["objects"]
+                ]
         
-        return result
+        return {
+            "type": mock_result["type"],
+            "content": content,
+            "confidence": confidence,
+            "details": details
+        }
     
     async def get_supported_types(self) -> list:
         """获取支持的识别类型"""
@@ -14,10 +14,20 @@ MCP图像识别系统 - 数据模型定义
 版本：1.0.0
 """
 
+import time
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Dict, Any, List
+from pydantic import BaseModel, Field, PlainSerializer
+
+# ==================== 公共类型 ====================
+
+# 时间戳类型：内部保存为time.time()的浮点数，仅在序列化时转换为ISO格式字符串。
+# 相比default_factory=datetime.now，每次创建响应模型时不再构造datetime对象。
+EpochTimestamp = Annotated[
+    float,
+    PlainSerializer(lambda value: datetime.fromtimestamp(value).isoformat(), return_type=str)
+]
 
 # ==================== 枚举定义 ====================
 
@@ -26,12 +36,13 @@ class ProcessStatus(str, Enum):
     处理状态枚举
 
     定义了记录处理的各种状态，用于跟踪处理进度。
-    当前系统支持的状态包括等待、处理中、成功和失败。
+    当前系统支持的状态包括等待、处理中、成功、失败和跳过。
     """
     PENDING = "pending"       # 等待处理
     PROCESSING = "processing" # 正在处理
     SUCCESS = "success"       # 处理成功
     FAILED = "failed"         # 处理失败
+    SKIPPED = "skipped"       # 已处理过，跳过
 
 class VisionResultType(str, Enum):
     """
@@ -161,7 +172,7 @@ class ProcessResult(BaseModel):
     ai_result: Optional[AIProcessResult] = Field(None, description="AI处理结果")
     error_message: Optional[str] = Field(None, description="错误信息")
     processing_time: float = Field(..., ge=0.0, description="总处理耗时（秒）")
-    timestamp: datetime = Field(default_factory=datetime.now, description="处理时间戳")
+    timestamp: EpochTimestamp = Field(default_factory=time.time, description="处理时间戳")
     
     class Config:
         """Pydantic配置"""
@@ -202,7 +213,7 @@ class APIResponse(BaseModel):
     message: str = Field(..., description="响应消息")
     data: Optional[Any] = Field(None, description="响应数据")
     error: Optional[str] = Field(None, description="错误信息")
-    timestamp: datetime = Field(default_factory=datetime.now, description="响应时间戳")
+    timestamp: EpochTimestamp = Field(default_factory=time.time, description="响应时间戳")
     
     class Config:
         """Pydantic配置"""
@@ -225,7 +236,7 @@ class HealthCheckResponse(BaseModel):
     overall_status: str = Field(..., description="整体健康状态")
     services: Dict[str, Any] = Field(..., description="各服务的健康状态")
     model_info: Dict[str, Any] = Field(..., description="模型信息")
-    timestamp: datetime = Field(default_factory=datetime.now, description="检查时间戳")
+    timestamp: EpochTimestamp = Field(default_factory=time.time, description="检查时间戳")
     
     class Config:
         """Pydantic配置"""
@@ -253,9 +264,9 @@ class ToolsResponse(BaseModel):
     定义了MCP工具列表接口的响应格式。
     """
     success: bool = Field(..., description="操作是否成功")
-    tools: List[Dict[str, str]] = Field(..., description="MCP工具列表")
+    tools: List[Dict[str, Any]] = Field(..., description="MCP工具列表")
     count: int = Field(..., description="工具数量")
-    timestamp: datetime = Field(default_factory=datetime.now, description="响应时间戳")
+    timestamp: EpochTimestamp = Field(default_factory=time.time, description="响应时间戳")
     
     class Config:
         """Pydantic配置"""
@@ -0,0 +1,119 @@
+"""
+MCP图像识别系统 - AI响应缓存模块
+
+为本地AI模型调用提供进程内的精确匹配缓存。
+相同的（模型, 系统提示词, 用户提示词）组合直接返回缓存的响应，
+跳过一次完整的模型推理。缓存值不限类型，也用于缓存整条记录的处理结果。
+
+技术特点：
+- 基于OrderedDict实现LRU淘汰
+- 每条缓存带过期时间（TTL）
+- 缓存键为提示词内容的blake2b摘要，避免长提示词常驻内存
+
+作者：MCP图像识别系统
+版本：1.0.0
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+class AIResponseCache:
+    """
+    AI响应缓存
+
+    精确匹配的LRU + TTL缓存。只在单个事件循环中使用，不需要加锁。
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大缓存条数，超出时淘汰最久未使用的条目
+            ttl: 缓存有效期（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: Optional[str], prompt: str) -> str:
+        """
+        生成缓存键
+
+        Args:
+            model: 模型名称
+            system_prompt: 系统提示词
+            prompt: 用户提示词
+
+        Returns:
+            str: 缓存键
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (model, system_prompt or "", prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")  # 分隔符，避免不同拆分得到相同摘要
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Any]: 缓存的值，未命中或已过期时返回None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存的值（AI响应文本或处理结果）
+        """
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 缓存条数和命中统计
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -19,10 +19,109 @@ import asyncio
 import random
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
 
+from api_server.config.settings import get_settings
 from api_server.models.models import VisionResult, VisionResultType
 
+# ==================== Mock识别结果模板 ====================
+# 预定义的识别结果模板，模块加载时构造一次
+_RECOGNITION_TEMPLATES = {
+    VisionResultType.FACE_RECOGNITION: [
+        {
+            "content": "检测到1个面部，年龄25-35岁，男性，微笑",
+            "details": {
+                "face_count": 1,
+                "age_range": "25-35",
+                "gender": "male",
+                "emotion": "smile",
+                "glasses": False
+            }
+        },
+        {
+            "content": "检测到2个面部，年龄20-30岁，女性，中性表情",
+            "details": {
+                "face_count": 2,
+                "age_range": "20-30",
+                "gender": "female",
+                "emotion": "neutral",
+                "glasses": True
+            }
+        },
+        {
+            "content": "检测到1个面部，年龄40-50岁，男性，严肃",
+            "details": {
+                "face_count": 1,
+                "age_range": "40-50",
+                "gender": "male",
+                "emotion": "serious",
+                "glasses": True
+            }
+        }
+    ],
+    VisionResultType.DOCUMENT_ANALYSIS: [
+        {
+            "content": "检测到身份证，包含姓名、身份证号、地址等信息",
+            "details": {
+                "document_type": "id_card",
+                "fields_detected": ["name", "id_number", "address", "birth_date"],
+                "text_quality": "high"
+            }
+        },
+        {
+            "content": "检测到驾驶证，包含姓名、证件号、有效期等信息",
+            "details": {
+                "document_type": "driver_license",
+                "fields_detected": ["name", "license_number", "expiry_date"],
+                "text_quality": "medium"
+            }
+        }
+    ],
+    VisionResultType.TEXT_RECOGNITION: [
+        {
+            "content": "识别到文本：这是一段测试文本，包含中英文混合内容",
+            "details": {
+                "text_blocks": 3,
+                "languages": ["zh", "en"],
+                "text_orientation": "horizontal"
+            }
+        },
+        {
+            "content": "识别到文本：产品名称、价格、规格等商品信息",
+            "details": {
+                "text_blocks": 5,
+                "languages": ["zh"],
+                "text_orientation": "horizontal"
+            }
+        }
+    ],
+    VisionResultType.OBJECT_DETECTION: [
+        {
+            "content": "检测到3个物体：汽车、行人、交通标志",
+            "details": {
+                "objects": [
+                    {"type": "car", "confidence": 0.95, "bbox": [100, 100, 200, 200]},
+                    {"type": "person", "confidence": 0.88, "bbox": [300, 150, 350, 300]},
+                    {"type": "traffic_sign", "confidence": 0.92, "bbox": [50, 50, 80, 80]}
+                ]
+            }
+        }
+    ],
+    VisionResultType.SCENE_ANALYSIS: [
+        {
+            "content": "场景分析：室内办公环境，包含桌椅、电脑、文件等",
+            "details": {
+                "scene_type": "office",
+                "lighting": "artificial",
+                "objects_count": 8,
+                "people_count": 2
+            }
+        }
+    ]
+}
+
 class BaseVisionProvider(ABC):
     """
     图像识别提供者基类
@@ -67,106 +166,78 @@ class MockVisionProvider(BaseVisionProvider):
     - 支持多种识别类型
     """
     
-    def __init__(self):
-        """初始化Mock图像识别提供者"""
+    def __init__(self, mock_delay_range: Optional[Tuple[float, float]] = None):
+        """
+        初始化Mock图像识别提供者
+        
+        Args:
+            mock_delay_range: 模拟处理延迟范围（秒），为None时按配置决定：
+                MOCK_VISION_FIXED_LATENCY大于0时使用固定延迟，
+                MOCK_VISION_SIMULATE_LATENCY开启时使用0.1-0.3秒随机延迟，
+                否则不模拟延迟
+        """
         self.provider_name = "Mock Vision Provider"
         self.version = "1.0.0"
         
-        # 预定义的识别结果模板
-        self.recognition_templates = {
-            VisionResultType.FACE_RECOGNITION: [
-                {
-                    "content": "检测到1个面部，年龄25-35岁，男性，微笑",
-                    "details": {
-                        "face_count": 1,
-                        "age_range": "25-35",
-                        "gender": "male",
-                        "emotion": "smile",
-                        "glasses": False
-                    }
-                },
-                {
-                    "content": "检测到2个面部，年龄20-30岁，女性，中性表情",
-                    "details": {
-                        "face_count": 2,
-                        "age_range": "20-30",
-                        "gender": "female",
-                        "emotion": "neutral",
-                        "glasses": True
-                    }
-                },
-                {
-                    "content": "检测到1个面部，年龄40-50岁，男性，严肃",
-                    "details": {
-                        "face_count": 1,
-                        "age_range": "40-50",
-                        "gender": "male",
-                        "emotion": "serious",
-                        "glasses": True
-                    }
-                }
-            ],
-            VisionResultType.DOCUMENT_ANALYSIS: [
-                {
-                    "content": "检测到身份证，包含姓名、身份证号、地址等信息",
-                    "details": {
-                        "document_type": "id_card",
-                        "fields_detected": ["name", "id_number", "address", "birth_date"],
-                        "text_quality": "high"
-                    }
-                },
-                {
-                    "content": "检测到驾驶证，包含姓名、证件号、有效期等信息",
-                    "details": {
-                        "document_type": "driver_license",
-                        "fields_detected": ["name", "license_number", "expiry_date"],
-                        "text_quality": "medium"
-                    }
-                }
-            ],
-            VisionResultType.TEXT_RECOGNITION: [
-                {
-                    "content": "识别到文本：这是一段测试文本，包含中英文混合内容",
-                    "details": {
-                        "text_blocks": 3,
-                        "languages": ["zh", "en"],
-                        "text_orientation": "horizontal"
-                    }
-                },
-                {
-                    "content": "识别到文本：产品名称、价格、规格等商品信息",
-                    "details": {
-                        "text_blocks": 5,
-                        "languages": ["zh"],
-                        "text_orientation": "horizontal"
-                    }
-                }
-            ],
-            VisionResultType.OBJECT_DETECTION: [
-                {
-                    "content": "检测到3个物体：汽车、行人、交通标志",
-                    "details": {
-                        "objects": [
-                            {"type": "car", "confidence": 0.95, "bbox": [100, 100, 200, 200]},
-                            {"type": "person", "confidence": 0.88, "bbox": [300, 150, 350, 300]},
-                            {"type": "traffic_sign", "confidence": 0.92, "bbox": [50, 50, 80, 80]}
-                        ]
-                    }
-                }
-            ],
-            VisionResultType.SCENE_ANALYSIS: [
-                {
-                    "content": "场景分析：室内办公环境，包含桌椅、电脑、文件等",
-                    "details": {
-                        "scene_type": "office",
-                        "lighting": "artificial",
-                        "objects_count": 8,
-                        "people_count": 2
-                    }
-                }
-            ]
+        if mock_delay_range is None:
+            settings = get_settings()
+            if settings.MOCK_VISION_FIXED_LATENCY > 0:
+                fixed_latency = settings.MOCK_VISION_FIXED_LATENCY
+                mock_delay_range = (fixed_latency, fixed_latency)
+            elif settings.MOCK_VISION_SIMULATE_LATENCY:
+                mock_delay_range = (0.1, 0.3)
+        self.mock_delay_range = mock_delay_range
+        
+        # 实例独立的随机数生成器，不与其他模块共享全局random状态
+        self._rng = random.Random()
+        
+        # 预定义的识别结果模板（模块级常量，所有实例共享）
+        self.recognition_templates = _RECOGNITION_TEMPLATES
+        
+        # ==================== 预计算的模板索引 ====================
+        # 识别类型和各类型的模板在初始化时展开为按下标访问的元组，
+        # recognize只需生成随机下标，不再每次构造list(VisionResultType)。
+        # 模板转换为(content, details)元组，details冻结为只读映射，并发请求共享时不会被下游修改。
+        self._types = tuple(VisionResultType)
+        self._n_types = len(self._types)
+        self._type_templates = tuple(
+            tuple(
+                self._freeze_template(template)
+                for template in self.recognition_templates.get(recognition_type)
+                or [self._default_template(recognition_type)]
+            )
+            for recognition_type in self._types
+        )
+    
+    @staticmethod
+    def _default_template(recognition_type: VisionResultType) -> Dict[str, Any]:
+        """
+        生成没有预定义模板的识别类型使用的默认模板
+        
+        Args:
+            recognition_type: 识别类型
+            
+        Returns:
+            Dict[str, Any]: 默认模板
+        """
+        return {
+            "content": f"Mock识别结果：{recognition_type.value}",
+            "details": {"mock": True, "type": recognition_type.value}
         }
     
+    @staticmethod
+    def _freeze_template(template: Dict[str, Any]) -> Tuple[str, MappingProxyType]:
+        """
+        把模板转换为(content, details)元组，details冻结为只读映射
+        
+        Args:
+            template: 识别结果模板
+            
+        Returns:
+            Tuple[str, MappingProxyType]: 识别内容和只读的详细信息
+        """
+        return template["content"], MappingProxyType(dict(template["details"]))
+    
     async def recognize(self, data: Dict[str, Any]) -> VisionResult:
         """
         执行Mock图像识别
@@ -179,37 +250,31 @@ class MockVisionProvider(BaseVisionProvider):
         Returns:
             VisionResult: Mock图像识别结果
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # 模拟处理时间（0.1-0.3秒）
-        processing_delay = random.uniform(0.1, 0.3)
-        await asyncio.sleep(processing_delay)
+        # 模拟处理时间（仅在配置了延迟范围时，压测和测试时默认不等待）
+        if self.mock_delay_range:
+            await asyncio.sleep(self._rng.uniform(*self.mock_delay_range))
         
-        # 随机选择识别类型
-        recognition_type = random.choice(list(VisionResultType))
-        
-        # 获取对应类型的模板
-        templates = self.recognition_templates.get(recognition_type, [])
-        if not templates:
-            # 如果没有模板，使用默认模板
-            template = {
-                "content": f"Mock识别结果：{recognition_type.value}",
-                "details": {"mock": True, "type": recognition_type.value}
-            }
-        else:
-            template = random.choice(templates)
+        # 随机选择识别类型及该类型下的模板（按预计算的下标访问）
+        type_index = self._rng.randrange(self._n_types)
+        recognition_type = self._types[type_index]
+        templates = self._type_templates[type_index]
+        content, details = templates[self._rng.randrange(len(templates))]
         
         # 生成随机置信度（0.7-0.95）
-        confidence = random.uniform(0.7, 0.95)
+        confidence = self._rng.uniform(0.7, 0.95)
         
         # 计算实际处理时间
-        actual_processing_time = time.time() - start_time
+        actual_processing_time = time.perf_counter() - start_time
         
-        return VisionResult(
+        # 各字段均来自预定义模板和本地计算，使用model_construct跳过校验；
+        # details复制为普通dict，避免结果持有共享的只读模板
+        return VisionResult.model_construct(
             type=recognition_type,
-            content=template["content"],
+            content=content,
             confidence=confidence,
-            details=template["details"],
+            details=dict(details),
             processing_time=actual_processing_time
         )
     
@@ -226,7 +291,10 @@ class MockVisionProvider(BaseVisionProvider):
             "provider": self.provider_name,
             "version": self.version,
             "supported_types": [t.value for t in VisionResultType],
-            "response_time": "0.1-0.3s",
+            "response_time": (
+                f"{self.mock_delay_range[0]}-{self.mock_delay_range[1]}s"
+                if self.mock_delay_range else "0s"
+            ),
             "mock": True
         }
 
@@ -272,9 +340,40 @@ class RealVisionProvider(BaseVisionProvider):
         }
 
 # ==================== 全局提供者实例 ====================
-# 创建全局图像识别提供者实例
-mock_vision_provider = MockVisionProvider()
-real_vision_provider = RealVisionProvider()
+# 提供者实例在首次使用时创建，导入模块时不读取配置、不构造模板索引
+
+@lru_cache(maxsize=1)
+def get_mock_vision_provider() -> MockVisionProvider:
+    """
+    获取Mock图像识别提供者实例
+    
+    Returns:
+        MockVisionProvider: 全局共享的Mock图像识别提供者
+    """
+    return MockVisionProvider()
+
+@lru_cache(maxsize=1)
+def get_real_vision_provider() -> RealVisionProvider:
+    """
+    获取真实图像识别提供者实例
+    
+    Returns:
+        RealVisionProvider: 全局共享的真实图像识别提供者
+    """
+    return RealVisionProvider()
+
+def __getattr__(name: str):
+    """
+    模块级属性钩子
+    
+    兼容旧的 `from api_server.providers.vision_provider import mock_vision_provider` 写法，
+    在首次访问时才创建提供者实例。
+    """
+    if name == "mock_vision_provider":
+        return get_mock_vision_provider()
+    if name == "real_vision_provider":
+        return get_real_vision_provider()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_vision_provider(use_mock: bool = True) -> BaseVisionProvider:
     """
@@ -287,6 +386,6 @@ def get_vision_provider(use_mock: bool = True) -> BaseVisionProvider:
         BaseVisionProvider: 图像识别提供者实例
     """
     if use_mock:
-        return mock_vision_provider
+        return get_mock_vision_provider()
     else:
-        return real_vision_provider
+        return get_real_vision_provider()
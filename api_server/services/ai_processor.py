@@ -21,16 +21,30 @@ MCP图像识别系统 - AI处理服务模块
 """
 
 import asyncio
+import logging
 import time
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 
-from api_server.config.settings import settings
+import orjson
+
+from api_server.config.settings import get_settings
 from api_server.models.models import (
     ProcessResult, ProcessStatus, VisionResult, AIProcessResult, VisionResultType
 )
-from api_server.services.mcp_client import mcp_client_service
-from api_server.providers.vision_provider import mock_vision_provider
-from api_server.providers.local_ai_provider import local_ai_provider
+from api_server.services.mcp_client import get_mcp_client_service
+from api_server.providers.vision_provider import get_vision_provider
+from api_server.providers.ai_cache import AIResponseCache
+from api_server.providers.local_ai_provider import get_local_ai_provider
+from api_server.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 简单文本处理结果的标识前缀
+SIMPLE_PROCESSING_PREFIX = "[简单处理] "
+
+# 不参与图像识别和AI处理的记录字段，不计入处理结果缓存键
+RESULT_CACHE_IGNORED_FIELDS = frozenset({"id", "result_text", "create_time", "update_time"})
 
 class AIProcessorService:
     """
@@ -57,11 +71,27 @@ class AIProcessorService:
         - 图像识别提供者：当前使用Mock实现
         - AI提供者：使用本地Qwen3模型
         """
-        self.mcp_client = mcp_client_service
-        self.vision_provider = mock_vision_provider  # 当前使用Mock实现
-        self.ai_provider = local_ai_provider
+        self.mcp_client = get_mcp_client_service()
+        self.vision_provider = get_vision_provider(use_mock=True)  # 当前使用Mock实现
+        self.ai_provider = get_local_ai_provider()
+        
+        settings = get_settings()
+        
+        # 所有批量请求共享的并发信号量，限制同时处理的记录总数
+        self.record_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        
+        # 处理结果缓存：处理输入完全相同的记录复用已有的(图像识别结果, AI处理结果)
+        self.result_cache: Optional[AIResponseCache] = (
+            AIResponseCache(maxsize=settings.RESULT_CACHE_SIZE, ttl=settings.RESULT_CACHE_TTL)
+            if settings.RESULT_CACHE_ENABLED else None
+        )
     
-    async def process_record(self, record_id: str, force_reprocess: bool = False) -> ProcessResult:
+    async def process_record(
+        self,
+        record_id: str,
+        force_reprocess: bool = False,
+        record_data: Optional[Dict[str, Any]] = None
+    ) -> ProcessResult:
         """
         处理指定记录的完整流程
         
@@ -71,70 +101,108 @@ class AIProcessorService:
         Args:
             record_id: 记录ID，用于标识要处理的记录
             force_reprocess: 是否强制重新处理
+            record_data: 已通过MCP获取的记录数据（批量处理时预先获取），为None时在步骤1中获取
             
         Returns:
             ProcessResult: 完整的处理结果
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
+        # 返回的ProcessResult字段均由本服务生成，使用model_construct跳过校验；
+        # 外部数据（MCP返回内容）在解析时处理，不依赖这里的模型校验
         try:
-            print(f"\n🎯 ===== 开始完整AI处理流程 =====")
-            print(f"📋 处理记录ID: {record_id}")
-            print(f"🔄 强制重新处理: {force_reprocess}")
-            print(f"⚠️ 重要声明：本流程严格通过MCP服务器，绝不直接调用简道云API")
-            print(f"⚠️ 所有数据读写操作都通过MCP工具：query_data 和 process_and_save")
+            # 重要声明：本流程严格通过MCP服务器，所有数据读写操作都通过MCP工具
+            # query_image_data 和 process_and_save，绝不直接调用简道云API
+            logger.info("🎯 开始完整AI处理流程: 记录ID=%s, 强制重新处理=%s", record_id, force_reprocess)
             
             # 步骤1：通过MCP获取记录数据
-            print(f"\n📥 步骤1：通过MCP获取记录数据")
-            record_data = await self._get_record_data(record_id)
+            logger.debug("📥 步骤1：通过MCP获取记录数据")
+            if record_data is None:
+                record_data = await self._get_record_data(record_id)
             
             if not record_data.get("success"):
-                print(f"❌ 步骤1失败：MCP数据获取失败")
-                return ProcessResult(
+                logger.warning("❌ 步骤1失败：MCP数据获取失败: %s", record_id)
+                return ProcessResult.model_construct(
                     success=False,
                     record_id=record_id,
                     status=ProcessStatus.FAILED,
                     error_message=record_data.get("error", "获取记录失败"),
-                    processing_time=time.time() - start_time
+                    processing_time=time.perf_counter() - start_time
                 )
             
             data = record_data["data"]
-            print(f"✅ 记录数据获取成功: {data.get('source_text', '')[:50]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✅ 记录数据获取成功: %s...", str(data.get('source_text', ''))[:50])
+            
+            # 记录已有处理结果且不要求强制重新处理时，直接跳过后续步骤，返回记录中已保存的结果
+            if not force_reprocess and data.get("result_text"):
+                total_time = time.perf_counter() - start_time
+                logger.info("⏭️ 记录已处理过，跳过: 记录ID=%s", record_id)
+                return ProcessResult.model_construct(
+                    success=True,
+                    record_id=record_id,
+                    status=ProcessStatus.SKIPPED,
+                    ai_result=AIProcessResult.model_construct(
+                        original_text=data.get("source_text", ""),
+                        processed_text=data["result_text"],
+                        ai_analysis="记录已处理过，沿用已保存的处理结果",
+                        confidence=1.0,
+                        processing_time=0.0
+                    ),
+                    processing_time=total_time
+                )
             
-            # 步骤2：图像识别处理
-            print(f"\n👁️ 步骤2：图像识别处理")
-            vision_result = await self._process_vision(data)
-            print(f"✅ 图像识别完成: {vision_result.type} - {vision_result.confidence:.2f}")
+            source_text = data.get("source_text", "")
+            cache_key = None
+            cached = None
+            if self.result_cache is not None:
+                cache_key = self._result_cache_key(data)
+                if not force_reprocess:
+                    cached = self.result_cache.get(cache_key)
             
-            # 步骤3：AI处理
-            print(f"\n🤖 步骤3：AI处理")
-            ai_result = await self._process_ai(vision_result, data.get("source_text", ""))
-            print(f"✅ AI处理完成: {ai_result.processed_text[:50]}...")
+            if cached is not None:
+                # 相同输入已处理过，跳过图像识别和AI处理，直接回写
+                vision_result, ai_result = cached
+                logger.debug("♻️ 命中处理结果缓存，跳过步骤2和步骤3")
+            else:
+                # 步骤2：图像识别处理
+                logger.debug("👁️ 步骤2：图像识别处理")
+                vision_result = await self._process_vision(data)
+                logger.debug("✅ 图像识别完成: %s - %.2f", vision_result.type, vision_result.confidence)
+                
+                # 步骤3：AI处理
+                logger.debug("🤖 步骤3：AI处理")
+                ai_result = await self._process_ai(vision_result, source_text)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("✅ AI处理完成: %s...", ai_result.processed_text[:50])
+                
+                # 只缓存正常完成的结果，失败时的备用结果下次需要重新处理
+                if cache_key is not None and self._is_cacheable(vision_result, ai_result):
+                    self.result_cache.set(cache_key, (vision_result, ai_result))
             
             # 步骤4：通过MCP保存数据
-            print(f"\n💾 步骤4：通过MCP保存数据")
+            logger.debug("💾 步骤4：通过MCP保存数据")
             update_result = await self._update_record(record_id, ai_result, vision_result)
             
             if not update_result.get("success"):
-                print(f"❌ 步骤4失败：MCP数据保存失败")
-                return ProcessResult(
+                logger.warning("❌ 步骤4失败：MCP数据保存失败: %s", record_id)
+                return ProcessResult.model_construct(
                     success=False,
                     record_id=record_id,
                     status=ProcessStatus.FAILED,
                     vision_result=vision_result,
                     ai_result=ai_result,
                     error_message=update_result.get("error", "数据回写失败"),
-                    processing_time=time.time() - start_time
+                    processing_time=time.perf_counter() - start_time
                 )
             
-            print("✅ 数据回写成功")
+            logger.debug("✅ 数据回写成功")
             
             # 步骤5：返回成功结果
-            total_time = time.time() - start_time
-            print(f"🎉 处理完成，总耗时: {total_time:.2f}秒")
-            print(f"🔚 ===== AI处理流程完成 =====\n")
+            total_time = time.perf_counter() - start_time
+            logger.info("🎉 处理完成: 记录ID=%s, 总耗时 %.2f秒", record_id, total_time)
             
-            return ProcessResult(
+            return ProcessResult.model_construct(
                 success=True,
                 record_id=record_id,
                 status=ProcessStatus.SUCCESS,
@@ -145,16 +213,56 @@ class AIProcessorService:
             
         except Exception as e:
             error_msg = f"处理过程中发生错误: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error("❌ %s", error_msg)
             
-            return ProcessResult(
+            return ProcessResult.model_construct(
                 success=False,
                 record_id=record_id,
                 status=ProcessStatus.FAILED,
                 error_message=error_msg,
-                processing_time=time.time() - start_time
+                processing_time=time.perf_counter() - start_time
             )
     
+    @staticmethod
+    def _result_cache_key(data: Dict[str, Any]) -> str:
+        """
+        生成处理结果缓存键
+        
+        图像识别接收整条记录数据，因此缓存键覆盖除ID、已有结果和时间戳以外的全部字段，
+        再加上识别方式和AI模型，与AIResponseCache.make_key的(模型, 系统提示词, 提示词)对应。
+        源文本相同但图像或其他识别输入不同的记录不会共用结果。
+        
+        Args:
+            data: 记录数据
+            
+        Returns:
+            str: 缓存键
+        """
+        settings = get_settings()
+        inputs = {key: value for key, value in data.items() if key not in RESULT_CACHE_IGNORED_FIELDS}
+        return AIResponseCache.make_key(
+            settings.LOCAL_AI_MODEL if settings.USE_LOCAL_AI else "simple",
+            "mock" if settings.USE_MOCK_VISION else "real",
+            orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str).decode()
+        )
+    
+    @staticmethod
+    def _is_cacheable(vision_result: VisionResult, ai_result: AIProcessResult) -> bool:
+        """
+        判断处理结果是否可以缓存
+        
+        图像识别失败时的默认结果在details中带有error，
+        AI处理失败时的备用结果以"AI处理失败"开头，这两种结果都不缓存。
+        
+        Args:
+            vision_result: 图像识别结果
+            ai_result: AI处理结果
+            
+        Returns:
+            bool: 是否可以缓存
+        """
+        return "error" not in vision_result.details and not ai_result.ai_analysis.startswith("AI处理失败")
+    
     async def _get_record_data(self, record_id: str) -> Dict[str, Any]:
         """
         通过MCP获取记录数据
@@ -169,30 +277,24 @@ class AIProcessorService:
             Dict[str, Any]: 包含获取结果的字典
         """
         try:
-            print(f"\n🔍 ===== AI处理器：开始获取数据 =====")
-            print(f"📋 请求记录ID: {record_id}")
-            print(f"📡 调用MCP客户端获取数据...")
-            print(f"⚠️ 注意：此处绝对不会直接调用简道云API，只通过MCP服务器")
+            # 注意：此处绝对不会直接调用简道云API，只通过MCP服务器
+            logger.debug("🔍 调用MCP客户端获取数据: 记录ID=%s", record_id)
             
             result = await self.mcp_client.get_record(record_id)
             
             if result.get("success"):
-                data = result.get("data", {})
-                print(f"✅ MCP数据获取成功")
-                if isinstance(data, dict):
-                    print(f"📄 源文本预览: {str(data.get('source_text', ''))[:100]}...")
-                elif isinstance(data, list):
-                    print(f"📊 数据条数: {len(data)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    data = result.get("data", {})
+                    if isinstance(data, dict):
+                        logger.debug("✅ MCP数据获取成功，源文本预览: %s...", str(data.get('source_text', ''))[:100])
+                    elif isinstance(data, list):
+                        logger.debug("✅ MCP数据获取成功，数据条数: %d", len(data))
             else:
-                print(f"❌ MCP数据获取失败: {result.get('error', '未知错误')}")
-            
-            print(f"🔚 ===== AI处理器：数据获取完成 =====\n")
+                logger.warning("❌ MCP数据获取失败: %s", result.get('error', '未知错误'))
             return result
         except Exception as e:
             error_msg = f"MCP获取数据失败: {str(e)}"
-            print(f"❌ {error_msg}")
-            import traceback
-            print(f"详细错误: {traceback.format_exc()}")
+            logger.exception("❌ %s", error_msg)
             return {
                 "success": False,
                 "error": error_msg
@@ -212,21 +314,17 @@ class AIProcessorService:
             VisionResult: 图像识别结果
         """
         try:
-            print(f"👁️ 开始图像识别处理...")
-            if settings.USE_MOCK_VISION:
-                print(f"📝 使用Mock图像识别服务")
-                result = await self.vision_provider.recognize(record_data)
-                print(f"✅ Mock图像识别完成")
-                return result
+            if get_settings().USE_MOCK_VISION:
+                logger.debug("📝 使用Mock图像识别服务")
+                return await self.vision_provider.recognize(record_data)
             else:
                 # 这里后续集成真实的图像识别服务
-                print(f"🚧 真实图像识别服务尚未实现")
                 raise NotImplementedError("真实图像识别服务尚未实现")
                 
         except Exception as e:
-            print(f"❌ 图像识别失败: {e}")
+            logger.error("❌ 图像识别失败: %s", e)
             # 如果图像识别失败，返回一个默认结果
-            return VisionResult(
+            return VisionResult.model_construct(
                 type=VisionResultType.DOCUMENT_ANALYSIS,
                 content=f"图像识别失败: {str(e)}",
                 confidence=0.1,
@@ -247,25 +345,23 @@ class AIProcessorService:
         Returns:
             AIProcessResult: AI处理结果
         """
+        settings = get_settings()
         try:
-            print(f"🤖 开始AI处理...")
             if settings.USE_LOCAL_AI:
-                print(f"🧠 使用本地AI模型: {settings.LOCAL_AI_MODEL}")
-                result = await self.ai_provider.process_vision_result(
-                    vision_result.model_dump(),  # 使用model_dump替代dict()
+                logger.debug("🧠 使用本地AI模型: %s", settings.LOCAL_AI_MODEL)
+                return await self.ai_provider.process_vision_result(
+                    vision_result,  # 直接传递模型实例，不再逐条记录调用model_dump()
                     original_text
                 )
-                print(f"✅ 本地AI处理完成")
-                return result
             else:
-                print(f"📝 使用简单文本处理方案")
+                logger.debug("📝 使用简单文本处理方案")
                 # 如果不使用本地AI，使用简单的文本处理
                 return self._simple_text_processing(vision_result, original_text)
 
         except Exception as e:
-            print(f"❌ AI处理失败: {e}")
+            logger.error("❌ AI处理失败: %s", e)
             # 如果AI处理失败，使用备用方案
-            return AIProcessResult(
+            return AIProcessResult.model_construct(
                 original_text=original_text,
                 processed_text=f"[处理失败] {vision_result.content[:100]}...",
                 ai_analysis=f"AI处理失败: {str(e)}",
@@ -286,13 +382,10 @@ class AIProcessorService:
         Returns:
             AIProcessResult: 简单处理的结果
         """
-        print(f"📝 执行简单文本处理...")
-
-        processed_text = f"[简单处理] {vision_result.content}"
-
-        return AIProcessResult(
+        # 各字段均为本地生成的合法值，使用model_construct跳过校验
+        return AIProcessResult.model_construct(
             original_text=original_text,
-            processed_text=processed_text,
+            processed_text=SIMPLE_PROCESSING_PREFIX + vision_result.content,
             ai_analysis="使用简单文本处理方案",
             confidence=0.7,
             processing_time=0.1
@@ -314,63 +407,35 @@ class AIProcessorService:
             Dict[str, Any]: 包含更新结果的字典
         """
         try:
-            print(f"\n💾 ===== AI处理器：开始保存数据 =====")
-            print(f"📋 目标记录ID: {record_id}")
-
-            # 构造更新数据
-            updates = {
-                "original_text": ai_result.original_text,
-                "processed_text": ai_result.processed_text,
-                "vision_type": vision_result.type,
-                "vision_confidence": vision_result.confidence,
-                "ai_confidence": ai_result.confidence,
-                "processing_status": "completed"
-            }
-
-            print(f"📄 构造的更新数据:")
-            print(f"   - 原始文本长度: {len(updates['original_text'])} 字符")
-            print(f"   - 处理文本长度: {len(updates['processed_text'])} 字符")
-            print(f"   - 原始文本预览: {updates['original_text'][:50]}...")
-            print(f"   - 处理文本预览: {updates['processed_text'][:50]}...")
-            print(f"   - 视觉类型: {updates['vision_type']}")
-            print(f"   - 视觉置信度: {updates['vision_confidence']:.3f}")
-            print(f"   - AI置信度: {updates['ai_confidence']:.3f}")
-            print(f"   - 处理状态: {updates['processing_status']}")
-
-            print(f"📡 调用MCP客户端保存数据...")
-            print(f"⚠️ 注意：此处绝对不会直接调用简道云API，只通过MCP服务器")
+            # 构造更新数据：MCP保存工具只使用处理后的文本
+            updates = {"processed_text": ai_result.processed_text}
+
+            # 注意：此处绝对不会直接调用简道云API，只通过MCP服务器
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "💾 调用MCP客户端保存数据: 记录ID=%s, 视觉类型=%s, 视觉置信度=%.3f, AI置信度=%.3f, 处理文本=%s...",
+                    record_id, vision_result.type, vision_result.confidence,
+                    ai_result.confidence, ai_result.processed_text[:50]
+                )
 
             result = await self.mcp_client.update_record(record_id, updates)
 
-            print(f"📨 MCP客户端保存返回结果:")
-            print(f"   - 成功状态: {result.get('success')}")
-            print(f"   - 结果类型: {type(result)}")
-            print(f"   - 结果字段: {list(result.keys()) if isinstance(result, dict) else 'N/A'}")
-
             if result.get("success"):
-                print("✅ MCP数据保存成功")
-                api_response = result.get("api_response")
-                if api_response:
-                    print(f"📋 MCP服务器返回的简道云API响应:")
-                    print(f"   - 响应类型: {type(api_response)}")
-                    print(f"   - 响应内容: {str(api_response)[:200]}...")
+                logger.debug("✅ MCP数据保存成功: api_response=%s", result.get("api_response"))
             else:
-                print(f"❌ MCP数据保存失败: {result.get('error', '未知错误')}")
+                logger.warning("❌ MCP数据保存失败: %s", result.get('error', '未知错误'))
 
-            print(f"🔚 ===== AI处理器：数据保存完成 =====\n")
             return result
 
         except Exception as e:
             error_msg = f"MCP更新数据失败: {str(e)}"
-            print(f"❌ {error_msg}")
-            import traceback
-            print(f"详细错误: {traceback.format_exc()}")
+            logger.exception("❌ %s", error_msg)
             return {
                 "success": False,
                 "error": error_msg
             }
 
-    async def batch_process(self, record_ids: List[str]) -> Dict[str, Any]:
+    async def batch_process(self, record_ids: List[str], force_reprocess: bool = False) -> Dict[str, Any]:
         """
         批量处理记录
 
@@ -378,47 +443,77 @@ class AIProcessorService:
 
         Args:
             record_ids: 要处理的记录ID列表
+            force_reprocess: 是否强制重新处理已有处理结果的记录
 
         Returns:
             Dict[str, Any]: 批量处理结果
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         success_count = 0
         failed_count = 0
-
-        print(f"🔄 开始批量处理 {len(record_ids)} 条记录...")
-
-        # 控制并发数量
-        semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
-
-        async def process_single(record_id: str):
-            """处理单个记录的包装函数"""
-            async with semaphore:
-                return await self.process_record(record_id)
-
-        # 并发处理
-        tasks = [process_single(record_id) for record_id in record_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 统计结果
-        for result in results:
-            if isinstance(result, Exception):
-                failed_count += 1
+        skipped_count = 0
+
+        logger.info("🔄 开始批量处理 %d 条记录, 强制重新处理=%s", len(record_ids), force_reprocess)
+
+        # 一次MCP查询获取整批记录，每条记录只需再调用一次MCP保存结果
+        records = await self.mcp_client.get_records(record_ids)
+
+        # 异常按类型只记录一次完整堆栈，避免部分故障时日志被逐条堆栈淹没
+        logged_error_types = set()
+
+        # 控制并发数量（信号量在所有批量请求之间共享，多个批次不会叠加并发）
+        async def process_single(index: int, record_id: str):
+            """处理单个记录的包装函数，返回记录在批次中的位置和处理结果，异常转换为失败结果"""
+            item_start_time = time.perf_counter()
+            async with self.record_semaphore:
+                try:
+                    return index, await self.process_record(
+                        record_id,
+                        force_reprocess=force_reprocess,
+                        record_data=records[record_id]
+                    )
+                except Exception as e:
+                    if type(e) not in logged_error_types:
+                        logged_error_types.add(type(e))
+                        logger.exception("❌ 批量处理中出现异常: %s", e)
+                    return index, ProcessResult.model_construct(
+                        success=False,
+                        record_id=record_id,
+                        status=ProcessStatus.FAILED,
+                        error_message=f"处理过程中发生错误: {str(e)}",
+                        processing_time=time.perf_counter() - item_start_time
+                    )
+
+        # 并发处理，每条记录完成时立即计入统计，结果按请求顺序存放
+        tasks = [process_single(index, record_id) for index, record_id in enumerate(record_ids)]
+        results: List[ProcessResult] = [None] * len(record_ids)
+        for completed, next_done in enumerate(asyncio.as_completed(tasks), start=1):
+            index, result = await next_done
+            results[index] = result
+
+            if result.status == ProcessStatus.SKIPPED:
+                skipped_count += 1
             elif result.success:
                 success_count += 1
             else:
                 failed_count += 1
 
-        total_time = time.time() - start_time
+            logger.debug("📊 批量处理进度: %d/%d", completed, len(record_ids))
 
-        print(f"🎉 批量处理完成: 成功 {success_count}, 失败 {failed_count}, 耗时 {total_time:.2f}秒")
+        total_time = time.perf_counter() - start_time
+
+        logger.info(
+            "🎉 批量处理完成: 成功 %d, 失败 %d, 跳过 %d, 耗时 %.2f秒",
+            success_count, failed_count, skipped_count, total_time
+        )
 
         return {
             "success": True,
             "total_count": len(record_ids),
             "success_count": success_count,
             "failed_count": failed_count,
-            "results": [r for r in results if not isinstance(r, Exception)],
+            "skipped_count": skipped_count,
+            "results": results,
             "processing_time": total_time
         }
 
@@ -431,39 +526,24 @@ class AIProcessorService:
         Returns:
             Dict[str, Any]: 健康检查结果
         """
+        # MCP连接、图片识别服务和AI服务互不依赖，并发检查，总耗时取决于最慢的一项
+        probes = {
+            "mcp": self.mcp_client.health_check(),
+            "vision": self.vision_provider.health_check(),
+            "ai": self.ai_provider.health_check()
+        }
+        probe_results = await asyncio.gather(*probes.values(), return_exceptions=True)
+
         health_results = {}
         overall_healthy = True
-
-        # 检查MCP连接
-        try:
-            mcp_health = await self.mcp_client.health_check()
-            health_results["mcp"] = mcp_health
-            if mcp_health.get("status") != "healthy":
-                overall_healthy = False
-        except Exception as e:
-            health_results["mcp"] = {"status": "unhealthy", "error": str(e)}
-            overall_healthy = False
-
-        # 检查图片识别服务
-        try:
-            vision_health = await self.vision_provider.health_check()
-            health_results["vision"] = vision_health
-            if vision_health.get("status") != "healthy":
-                overall_healthy = False
-        except Exception as e:
-            health_results["vision"] = {"status": "unhealthy", "error": str(e)}
-            overall_healthy = False
-
-        # 检查AI服务
-        try:
-            ai_health = await self.ai_provider.health_check()
-            health_results["ai"] = ai_health
-            if ai_health.get("status") != "healthy":
+        for name, result in zip(probes, probe_results):
+            if isinstance(result, Exception):
+                result = {"status": "unhealthy", "error": str(result)}
+            health_results[name] = result
+            if result.get("status") != "healthy":
                 overall_healthy = False
-        except Exception as e:
-            health_results["ai"] = {"status": "unhealthy", "error": str(e)}
-            overall_healthy = False
 
+        settings = get_settings()
         return {
             "overall_status": "healthy" if overall_healthy else "unhealthy",
             "services": health_results,
@@ -475,5 +555,25 @@ class AIProcessorService:
         }
 
 # ==================== 全局AI处理服务实例 ====================
-# 创建全局AI处理服务实例，整个应用程序共享使用
-ai_processor_service = AIProcessorService()
+# 全局AI处理服务实例在首次使用时创建，整个应用程序共享使用
+
+@lru_cache(maxsize=1)
+def get_ai_processor_service() -> AIProcessorService:
+    """
+    获取AI处理服务实例
+    
+    Returns:
+        AIProcessorService: 全局共享的AI处理服务
+    """
+    return AIProcessorService()
+
+def __getattr__(name: str):
+    """
+    模块级属性钩子
+    
+    兼容旧的 `from api_server.services.ai_processor import ai_processor_service` 写法，
+    在首次访问时才创建服务实例。
+    """
+    if name == "ai_processor_service":
+        return get_ai_processor_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,12 +11,12 @@ MCP客户端服务模块
 4. 提供详细的调用链路日志
 
 MCP工具说明：
-- query_data: 查询简道云数据
+- query_image_data: 查询简道云数据（可按记录ID查询）
 - process_and_save: 处理文本并保存到简道云
 
 重要原则：
 - 所有简道云操作都通过MCP工具进行
-- 每次操作都建立新的MCP连接
+- 所有操作复用同一个MCP连接，断开后自动重连
 - 详细记录所有MCP调用过程
 - 绝对不允许任何绕过MCP的逻辑
 
@@ -24,14 +24,40 @@ MCP工具说明：
 版本：1.0.0
 """
 
-import json
+import asyncio
+import logging
 import os
-from typing import Dict, Any
-from api_server.config.settings import settings
+import sys
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+import anyio
+import orjson
+from api_server.config.settings import get_settings
+from api_server.utils.logging_config import get_logger
 
 # 使用官方MCP Python SDK
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import CallToolResult
+
+logger = get_logger(__name__)
+
+# 表示MCP连接已断开的异常，遇到时重新建立连接并重试一次
+CONNECTION_ERRORS = (
+    BrokenPipeError,
+    ConnectionError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+# 通过process_and_save保存处理结果时使用的标识
+SAVE_MARKER = "[API处理]"
+
+# 按记录ID查询数据的MCP工具
+QUERY_TOOL = "query_image_data"
 
 class MCPClientService:
     """
@@ -41,7 +67,7 @@ class MCPClientService:
     确保所有简道云数据操作都通过MCP服务器进行。
     
     设计原则：
-    1. 每次操作都建立新的MCP连接（确保连接稳定性）
+    1. 复用长连接的MCP会话，连接断开时自动重建
     2. 详细记录所有MCP调用过程（便于调试和验证）
     3. 绝对不允许绕过MCP的任何逻辑
     4. 提供清晰的错误处理和日志记录
@@ -60,23 +86,135 @@ class MCPClientService:
         current_file = os.path.abspath(__file__)
         api_server_dir = os.path.dirname(os.path.dirname(current_file))  # api_server目录
         self.project_root = os.path.dirname(api_server_dir)  # 项目根目录
-        self.server_path = os.path.join(self.project_root, settings.MCP_SERVER_PATH)
+        self.server_path = os.path.join(self.project_root, get_settings().MCP_SERVER_PATH)
+        
+        self.server_path_exists = os.path.exists(self.server_path)
+        
+        # MCP服务器启动参数，路径不会变化，只构造一次。
+        # 直接使用当前解释器启动MCP服务器，API服务器与MCP服务器运行在同一个环境中，
+        # 不再经过uv run（每次启动都要解析项目和检查锁文件）
+        self.server_params = StdioServerParameters(
+            command=sys.executable,  # 当前Python解释器
+            args=[self.server_path],  # 启动参数
+            env=None  # 使用当前环境变量
+        )
         
         # 记录初始化信息（仅在调试模式下显示详细信息）
-        print(f"🔧 MCP客户端初始化:")
-        print(f"   项目根目录: {self.project_root}")
-        print(f"   MCP服务器路径: {self.server_path}")
-        print(f"   文件是否存在: {os.path.exists(self.server_path)}")
+        logger.debug(
+            "🔧 MCP客户端初始化: 项目根目录=%s, MCP服务器路径=%s, 文件是否存在=%s",
+            self.project_root, self.server_path, self.server_path_exists
+        )
 
         # 连接状态标记（用于健康检查）
         self.is_connected = False
+        
+        # 共享的MCP会话（首次使用时建立，由后台任务持有连接）
+        self._session: Optional[ClientSession] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+    
+    async def _run_session(self, ready: "asyncio.Future[ClientSession]", closing: asyncio.Event):
+        """
+        持有MCP连接的后台任务
+        
+        stdio_client和ClientSession内部使用anyio任务组，必须在同一个任务中进入和退出，
+        因此由这个后台任务负责建立连接、初始化会话，并一直保持到收到关闭信号。
+        
+        Args:
+            ready: 会话初始化完成后设置结果的Future
+            closing: 关闭信号，设置后退出连接
+        """
+        server_params = self.server_params
+        try:
+            # 连接生命周期事件，每个连接只记录一次
+            logger.info("🚀 启动MCP服务器子进程: %s %s", server_params.command, server_params.args)
+            
+            # 建立MCP STDIO连接并创建会话
+            async with stdio_client(server_params) as (read_stream, write_stream):
+                # 设置读取超时，避免子进程异常退出时请求一直挂起
+                async with ClientSession(
+                    read_stream,
+                    write_stream,
+                    read_timeout_seconds=timedelta(seconds=get_settings().MCP_SERVER_TIMEOUT)
+                ) as session:
+                    await session.initialize()
+                    logger.info("✅ MCP会话初始化完成，连接将被复用")
+                    if ready.done():
+                        # 等待方已取消（例如启动健康检查超时），直接关闭连接
+                        return
+                    self.is_connected = True
+                    ready.set_result(session)
+                    await closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning("⚠️ MCP连接已断开: %s", e)
+        finally:
+            self.is_connected = False
+            if not ready.done():
+                ready.set_exception(ConnectionError("MCP连接意外关闭"))
+    
+    async def _ensure_session(self) -> ClientSession:
+        """
+        获取共享的MCP会话
+        
+        首次调用时启动MCP服务器子进程并初始化会话，之后直接返回已建立的会话。
+        连接断开后会在下次调用时重新建立。
+        
+        Returns:
+            ClientSession: 已初始化的MCP会话
+        """
+        async with self._lock:
+            if self._session is not None and self._session_task is not None and not self._session_task.done():
+                return self._session
+            
+            # 服务器脚本不存在时直接失败，不再每次都启动一个注定失败的子进程
+            if not self.server_path_exists:
+                raise FileNotFoundError(f"MCP服务器文件不存在: {self.server_path}")
+            
+            ready: "asyncio.Future[ClientSession]" = asyncio.get_running_loop().create_future()
+            self._closing = asyncio.Event()
+            self._session_task = asyncio.create_task(self._run_session(ready, self._closing))
+            try:
+                self._session = await ready
+            except BaseException:
+                # 初始化失败或被取消时通知后台任务退出
+                self._session = None
+                self._closing.set()
+                raise
+            return self._session
+    
+    async def _invalidate_session(self):
+        """关闭当前MCP连接，下次调用时重新建立"""
+        task, closing = self._session_task, self._closing
+        self._session = None
+        self._session_task = None
+        self._closing = None
+        if closing is not None:
+            closing.set()
+        if task is not None:
+            try:
+                await task
+            except Exception:
+                pass
+    
+    async def aclose(self):
+        """
+        关闭共享的MCP连接
+        
+        在应用关闭时调用，结束MCP服务器子进程。
+        """
+        async with self._lock:
+            await self._invalidate_session()
     
     async def _execute_mcp_operation(self, operation_func):
         """
         执行MCP操作的核心方法
         
-        这个方法为每个MCP操作建立新的连接，确保连接的稳定性和独立性。
-        记录详细的调用过程，便于调试和验证MCP调用链路。
+        在共享的MCP会话上执行操作，不再为每个操作启动子进程和初始化会话。
+        如果连接已断开，关闭旧连接后重新建立并重试一次。
         
         Args:
             operation_func: 要执行的MCP操作函数
@@ -88,151 +226,163 @@ class MCPClientService:
             Exception: MCP操作失败时抛出异常，绝不允许绕过
         """
         try:
-            print(f"\n🔧 ===== 开始MCP操作: {operation_func.__name__} =====")
-            print(f"📡 MCP服务器路径: {self.server_path}")
-            
-            # 配置MCP服务器启动参数
-            server_params = StdioServerParameters(
-                command="uv",  # 使用uv运行Python脚本
-                args=["run", "python", self.server_path],  # 启动参数
-                env=None  # 使用当前环境变量
-            )
+            logger.debug("🔧 开始MCP操作: %s", operation_func.__name__)
             
-            print(f"🚀 启动MCP服务器子进程...")
-            print(f"   命令: {server_params.command}")
-            print(f"   参数: {server_params.args}")
-            
-            # 建立MCP STDIO连接
-            async with stdio_client(server_params) as (read_stream, write_stream):
-                print(f"✅ MCP STDIO连接建立成功")
-                
-                # 创建MCP会话
-                async with ClientSession(read_stream, write_stream) as session:
-                    print(f"✅ MCP会话创建成功")
-                    
-                    # 初始化MCP会话
-                    print(f"🔄 初始化MCP会话...")
-                    await session.initialize()
-                    print(f"✅ MCP会话初始化完成")
-                    
-                    # 执行具体的MCP操作
-                    print(f"🎯 调用MCP操作函数: {operation_func.__name__}")
+            for attempt in range(2):
+                session = await self._ensure_session()
+                try:
                     result = await operation_func(session)
-                    print(f"✅ MCP操作函数执行完成")
-                    print(f"📤 MCP操作返回结果类型: {type(result)}")
-                    
-                    print(f"🔚 ===== MCP操作完成: {operation_func.__name__} =====\n")
-                    return result
+                    break
+                except CONNECTION_ERRORS as e:
+                    if attempt:
+                        raise
+                    logger.warning("⚠️ MCP连接已断开，重新建立连接后重试: %s", type(e).__name__)
+                    async with self._lock:
+                        if self._session is session:
+                            await self._invalidate_session()
+            
+            logger.debug("✅ MCP操作完成: %s", operation_func.__name__)
+            return result
                     
         except Exception as e:
-            print(f"❌ ===== MCP操作失败: {operation_func.__name__} =====")
-            print(f"❌ 错误信息: {e}")
-            print(f"❌ 错误类型: {type(e).__name__}")
+            logger.error("❌ MCP操作失败: %s, 错误类型: %s, 错误信息: %s", operation_func.__name__, type(e).__name__, e)
             # 绝对不允许绕过MCP - 如果MCP失败，整个操作就失败
             raise Exception(f"MCP操作失败，不允许绕过: {e}")
     
-    async def get_record(self, record_id: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_tool_result(result: CallToolResult) -> Dict[str, Any]:
         """
-        通过MCP获取简道云记录数据
+        解析MCP工具调用结果
+        
+        工具以单个文本内容返回JSON，直接交给orjson解析。
         
-        这个方法调用MCP服务器的query_data工具来获取简道云数据。
+        Args:
+            result: MCP工具调用结果
+            
+        Returns:
+            Dict[str, Any]: 解析后的结果，没有返回内容时为失败结果
+            
+        Raises:
+            Exception: 工具调用本身返回错误时抛出
+        """
+        if not result.content:
+            logger.warning("❌ MCP工具返回内容为空")
+            return {"success": False, "error": "No content returned"}
+        
+        content_text = result.content[0].text
+        if result.isError:
+            raise Exception(f"MCP工具返回错误: {content_text}")
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📄 MCP工具返回内容(%d 字符): %s...", len(content_text), content_text[:200])
+        return orjson.loads(content_text)
+    
+    @staticmethod
+    def _build_record(record_id: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        把MCP查询到的数据行转换为记录数据
+        
+        Args:
+            record_id: 请求的记录ID
+            item: MCP查询返回的一行数据
+            
+        Returns:
+            Dict[str, Any]: 记录数据
+        """
+        return {
+            "id": item.get("id", record_id),
+            "source_text": item.get("source_text", item.get("description", f"测试记录 {record_id} 的源文本内容")),
+            "result_text": item.get("result_text", ""),
+            "create_time": item.get("create_time", ""),
+            "update_time": item.get("update_time", "")
+        }
+    
+    async def get_records(self, record_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        通过MCP批量获取简道云记录数据
+        
+        只调用一次MCP服务器的query_image_data工具，由服务器按记录ID查找，
+        批量处理时不再为每条记录各查询一次。
         绝对不会直接调用简道云API。
         
         Args:
-            record_id: 记录ID（用于标识和日志记录）
+            record_ids: 记录ID列表
             
         Returns:
-            Dict[str, Any]: 包含查询结果的字典
-            {
-                "success": bool,      # 操作是否成功
-                "data": dict,         # 查询到的数据
-                "error": str          # 错误信息（如果有）
-            }
+            Dict[str, Dict[str, Any]]: 记录ID到查询结果的映射，每个查询结果的格式同get_record
         """
+        # 把记录ID交给服务器查找，查询条数正好是本批记录数
+        tool_params = {"limit": len(record_ids), "record_ids": list(record_ids)}
         try:
             async def query_operation(session):
                 """MCP查询操作的具体实现"""
-                print(f"🔍 ===== MCP工具调用开始 =====")
-                print(f"🛠️ 调用MCP工具: query_data")
-                print(f"📝 工具参数: {{'limit': 100}}")
-                
-                # 调用MCP工具
-                result = await session.call_tool("query_data", {"limit": 100})
-                
-                print(f"📨 MCP工具调用完成")
-                print(f"📦 返回结果类型: {type(result)}")
-                
-                # 解析MCP工具返回的结果
-                if hasattr(result, 'content') and result.content:
-                    content_text = result.content[0].text if result.content else "{}"
-                    print(f"📄 MCP工具返回内容长度: {len(content_text)} 字符")
-                    print(f"📄 MCP工具返回内容预览: {content_text[:200]}...")
-                    
-                    parsed_result = json.loads(content_text)
-                    print(f"✅ JSON解析成功")
-                    print(f"📊 解析后数据类型: {type(parsed_result)}")
-                    if isinstance(parsed_result, dict):
-                        print(f"📊 数据字段: {list(parsed_result.keys())}")
-                    print(f"🔚 ===== MCP工具调用结束 =====")
-                    
-                    return parsed_result
-                else:
-                    print(f"❌ MCP工具返回内容为空")
-                    print(f"🔚 ===== MCP工具调用结束 =====")
-                    return {"success": False, "error": "No content returned"}
+                logger.debug("🛠️ 调用MCP工具: %s, record_ids=%d个", QUERY_TOOL, len(record_ids))
+                result = await session.call_tool(QUERY_TOOL, tool_params)
+                return self._parse_tool_result(result)
             
-            print(f"🚀 开始通过MCP获取记录数据...")
+            logger.debug("🚀 开始通过MCP获取 %d 条记录数据...", len(record_ids))
             result = await self._execute_mcp_operation(query_operation)
-            print(f"📥 MCP操作返回结果: {result}")
             
             # 处理查询结果
             if not result.get("success"):
-                return {
+                error = {
                     "success": False,
                     "error": f"MCP查询失败: {result.get('error', '未知错误')}"
                 }
+                return {record_id: error for record_id in record_ids}
             
-            data_list = result.get("data", [])
-            
-            # 查找指定记录或返回第一条记录用于测试
-            for item in data_list:
-                if item.get("id") == record_id:
-                    return {
-                        "success": True,
-                        "data": {
-                            "id": item.get("id", record_id),
-                            "source_text": item.get("source_text", f"测试记录 {record_id} 的源文本内容"),
-                            "result_text": item.get("result_text", ""),
-                            "create_time": item.get("create_time", ""),
-                            "update_time": item.get("update_time", "")
-                        }
-                    }
+            # 按ID建立索引，每条记录的查找不再线性扫描整个结果
+            # （服务器返回的数据ID字段为id或data_id）
+            items_by_id = {}
+            for item in result.get("data", []):
+                items_by_id.setdefault(item.get("id") or item.get("data_id"), item)
             
-            # 如果没找到指定记录，返回第一条记录用于测试
-            if data_list:
-                first_item = data_list[0]
-                return {
-                    "success": True,
-                    "data": {
-                        "id": record_id,  # 使用请求的ID
-                        "source_text": first_item.get("source_text", f"测试记录 {record_id} 的源文本内容"),
-                        "result_text": first_item.get("result_text", ""),
-                        "create_time": first_item.get("create_time", ""),
-                        "update_time": first_item.get("update_time", "")
-                    }
-                }
+            # 没找到的记录直接返回失败，不再用第一条记录代替，避免把处理结果写到错误的数据上
+            records = {}
+            missing_ids = []
+            for record_id in record_ids:
+                item = items_by_id.get(record_id)
+                if item is not None:
+                    records[record_id] = {"success": True, "data": self._build_record(record_id, item)}
+                else:
+                    missing_ids.append(record_id)
+                    records[record_id] = {"success": False, "error": f"未找到记录: {record_id}"}
             
-            return {
-                "success": False,
-                "error": "未找到任何记录"
-            }
+            if missing_ids:
+                logger.warning(
+                    "⚠️ %d 条记录在简道云中不存在，前几个ID: %s",
+                    len(missing_ids), missing_ids[:10]
+                )
+            return records
             
         except Exception as e:
-            print(f"❌ MCP获取记录失败: {e}")
-            return {
+            logger.error("❌ MCP获取记录失败: %s", e)
+            error = {
                 "success": False,
                 "error": f"MCP获取记录失败: {str(e)}"
             }
+            return {record_id: error for record_id in record_ids}
+    
+    async def get_record(self, record_id: str) -> Dict[str, Any]:
+        """
+        通过MCP获取简道云记录数据
+        
+        这个方法调用MCP服务器的query_image_data工具来获取简道云数据。
+        绝对不会直接调用简道云API。
+        
+        Args:
+            record_id: 记录ID（用于标识和日志记录）
+            
+        Returns:
+            Dict[str, Any]: 包含查询结果的字典
+            {
+                "success": bool,      # 操作是否成功
+                "data": dict,         # 查询到的数据
+                "error": str          # 错误信息（如果有）
+            }
+        """
+        records = await self.get_records([record_id])
+        return records[record_id]
 
     async def update_record(self, record_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -260,42 +410,20 @@ class MCPClientService:
 
             async def save_operation(session):
                 """MCP保存操作的具体实现"""
-                print(f"💾 ===== MCP保存工具调用开始 =====")
-                print(f"🛠️ 调用MCP工具: process_and_save")
                 tool_params = {
                     "original_text": processed_text,
-                    "marker": "[API处理]"
+                    "marker": SAVE_MARKER
                 }
-                print(f"📝 工具参数:")
-                print(f"   - original_text: {processed_text[:100]}...")
-                print(f"   - marker: [API处理]")
-
-                # 调用MCP工具
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "🛠️ 调用MCP工具: process_and_save, original_text: %s..., marker: %s",
+                        processed_text[:100], SAVE_MARKER
+                    )
                 result = await session.call_tool("process_and_save", tool_params)
+                return self._parse_tool_result(result)
 
-                print(f"📨 MCP保存工具调用完成")
-                print(f"📦 返回结果类型: {type(result)}")
-
-                # 解析MCP工具返回的结果
-                if hasattr(result, 'content') and result.content:
-                    content_text = result.content[0].text if result.content else "{}"
-                    print(f"📄 MCP保存工具返回内容长度: {len(content_text)} 字符")
-                    print(f"📄 MCP保存工具返回内容: {content_text}")
-
-                    parsed_result = json.loads(content_text)
-                    print(f"✅ 保存结果JSON解析成功")
-                    print(f"📊 保存结果数据: {parsed_result}")
-                    print(f"🔚 ===== MCP保存工具调用结束 =====")
-
-                    return parsed_result
-                else:
-                    print(f"❌ MCP保存工具返回内容为空")
-                    print(f"🔚 ===== MCP保存工具调用结束 =====")
-                    return {"success": False, "error": "No content returned"}
-
-            print(f"🚀 开始通过MCP保存处理结果...")
             create_result = await self._execute_mcp_operation(save_operation)
-            print(f"💾 MCP保存操作返回结果: {create_result}")
+            logger.debug("💾 MCP保存操作返回结果: %s", create_result)
 
             return {
                 "success": True,
@@ -306,7 +434,7 @@ class MCPClientService:
             }
 
         except Exception as e:
-            print(f"❌ MCP更新记录失败: {e}")
+            logger.error("❌ MCP更新记录失败: %s", e)
             return {
                 "success": False,
                 "record_id": record_id,
@@ -342,7 +470,7 @@ class MCPClientService:
             }
 
         except Exception as e:
-            print(f"❌ MCP获取工具列表失败: {e}")
+            logger.error("❌ MCP获取工具列表失败: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to get tools: {str(e)}"
@@ -364,27 +492,19 @@ class MCPClientService:
             }
         """
         try:
-            print("🔗 健康检查时测试MCP连接...")
-
-            # 直接测试MCP连接
-            server_params = StdioServerParameters(
-                command="uv",
-                args=["run", "python", self.server_path],
-                env=None
-            )
+            logger.debug("🔗 健康检查时测试MCP连接...")
 
-            async with stdio_client(server_params) as (read_stream, write_stream):
-                async with ClientSession(read_stream, write_stream) as session:
-                    await session.initialize()
-                    tools_result = await session.list_tools()
-                    tools = tools_result.tools
+            # 在共享会话上获取工具列表，连接不存在时会自动建立
+            session = await self._ensure_session()
+            tools_result = await session.list_tools()
+            tools = tools_result.tools
 
-                    return {
-                        "status": "healthy",
-                        "connected": True,
-                        "server_path": self.server_path,
-                        "tools_count": len(tools)
-                    }
+            return {
+                "status": "healthy",
+                "connected": True,
+                "server_path": self.server_path,
+                "tools_count": len(tools)
+            }
 
         except Exception as e:
             return {
@@ -394,5 +514,25 @@ class MCPClientService:
             }
 
 # ==================== 全局MCP客户端实例 ====================
-# 创建全局MCP客户端实例，整个应用程序共享使用
-mcp_client_service = MCPClientService()
+# 首次使用时才创建实例，导入模块时不读取配置，也不检查服务器路径
+
+@lru_cache(maxsize=1)
+def get_mcp_client_service() -> MCPClientService:
+    """
+    获取MCP客户端服务实例
+    
+    Returns:
+        MCPClientService: 全局共享的MCP客户端服务
+    """
+    return MCPClientService()
+
+def __getattr__(name: str):
+    """
+    模块级属性钩子
+    
+    兼容旧的 `from api_server.services.mcp_client import mcp_client_service` 写法，
+    在首次访问时才创建实例。
+    """
+    if name == "mcp_client_service":
+        return get_mcp_client_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
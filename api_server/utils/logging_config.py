@@ -0,0 +1,93 @@
+"""
+MCP图像识别系统 - 日志配置模块
+
+提供API服务器统一的日志配置：
+- 请求处理路径只把日志记录放入内存队列（QueueHandler），不直接写磁盘
+- 后台线程（QueueListener）负责把日志写入控制台和LOG_FILE
+- 日志级别、格式和文件路径均来自Settings
+
+使用方式：
+    logger = get_logger(__name__)
+    logger.info("收到处理请求: %s", record_id)
+
+作者：MCP图像识别系统
+版本：1.0.0
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+from api_server.config.settings import get_settings
+
+# API服务器根日志记录器名称，所有模块日志记录器都挂在它下面
+ROOT_LOGGER_NAME = "api_server"
+
+# 后台日志监听器和安装在根日志记录器上的队列处理器（setup_logging创建，shutdown_logging移除）
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+def get_logger(name: str = ROOT_LOGGER_NAME) -> logging.Logger:
+    """
+    获取日志记录器
+
+    Args:
+        name: 日志记录器名称，通常传入模块的 __name__
+
+    Returns:
+        logging.Logger: 日志记录器
+    """
+    return logging.getLogger(name)
+
+def setup_logging() -> None:
+    """
+    配置API服务器日志
+
+    在api_server根日志记录器上安装QueueHandler，并启动QueueListener
+    把日志写入控制台和日志文件。重复调用不会重复安装。
+    """
+    global _queue_listener, _queue_handler
+    if _queue_listener is not None:
+        return
+
+    settings = get_settings()
+    formatter = logging.Formatter(settings.LOG_FORMAT)
+
+    # 实际执行I/O的处理器，在监听器线程中运行
+    handlers = [logging.StreamHandler()]
+    if settings.LOG_FILE:
+        log_dir = os.path.dirname(settings.LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.FileHandler(settings.LOG_FILE, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    root_logger.setLevel(settings.LOG_LEVEL)
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
+    root_logger.propagate = False
+
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+
+def shutdown_logging() -> None:
+    """
+    停止后台日志监听器
+
+    在应用关闭时调用，确保队列中剩余的日志全部写出，
+    并移除队列处理器，之后再次调用setup_logging不会重复写出日志。
+    """
+    global _queue_listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_queue_handler)
+        _queue_handler = None
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
@@ -5,145 +5,246 @@
 """
 
 import asyncio
-import json
-import subprocess
+import importlib.util
+import logging
 import sys
 import os
 import re
 from typing import Any, Dict, List, Optional
 
-class SimpleMCPClient:
+import orjson
+
+# 动态添加core/src到Python路径，以便导入mcp_jiandaoyun中的公共模块
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+src_path = os.path.join(project_root, 'core', 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from mcp_jiandaoyun.console import ainput
+from mcp_jiandaoyun.event_loop import install_uvloop
+from mcp_jiandaoyun.intent import NUM_RE, QUOTED_RE, make_intent_parser
+from mcp_jiandaoyun.pipeline_client import MCPSessionPool as BaseSessionPool, ScriptMCPClient
+
+# 进程内服务器内存流的缓冲消息数
+_INPROC_BUFFER = 64
+
+# 是否在进程内运行MCP服务器（默认关闭，设置环境变量MCP_CLIENT_IN_PROCESS=1开启）
+_IN_PROCESS = os.environ.get("MCP_CLIENT_IN_PROCESS") == "1"
+
+logger = logging.getLogger(__name__)
+
+# 意图关键词合并为一个正则，单次扫描完成匹配（关键词都是中文，不需要先转小写）
+_QUERY_RE = re.compile('查询|查看|显示|数据')
+_SAVE_RE = re.compile('添加|处理|保存|标识')
+
+class SimpleMCPClient(ScriptMCPClient):
     """简化的MCP客户端"""
     
-    def __init__(self, server_script: str):
-        self.server_script = server_script
-        self.process = None
-        self.request_id = 0
+    __slots__ = ()
     
-    async def start(self):
-        """启动MCP服务器"""
-        self.process = await asyncio.create_subprocess_exec(
-            sys.executable, self.server_script,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        
-        # 初始化连接
-        await self._send_request("initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {},
-            "clientInfo": {"name": "JianDaoYun Client", "version": "1.0"}
-        })
-        
+    async def _initialize(self):
+        """执行MCP初始化握手"""
+        await super()._initialize()
         print("✅ MCP服务器连接成功")
+
+class InProcessMCPClient(SimpleMCPClient):
+    """
+    进程内MCP客户端
     
-    async def stop(self):
-        """停止MCP服务器"""
-        if self.process:
-            self.process.terminate()
-            await self.process.wait()
+    直接导入服务器脚本中的FastMCP实例，在当前事件循环中运行服务器，
+    通过内存流收发消息，不再启动子进程，也没有管道读写和JSON编解码。
     
-    async def _send_request(self, method: str, params: Optional[Dict] = None) -> Dict:
-        """发送JSON-RPC请求"""
-        self.request_id += 1
-        request = {
-            "jsonrpc": "2.0",
-            "id": self.request_id,
-            "method": method
-        }
+    注意：
+    - 服务器脚本的模块级代码（日志配置、环境变量读取等）会在客户端进程中执行
+    - 依赖FastMCP的内部属性_mcp_server和MCP SDK 1.8+提供的mcp.shared.message
+    因此只在显式开启时使用，见start_mcp_client。
+    """
+    
+    __slots__ = ("_server_task", "_to_server")
+    
+    def __init__(self, server_script: str):
+        super().__init__(server_script)
+        self._server_task: Optional[asyncio.Task] = None
+        self._to_server = None
+    
+    async def start(self):
+        """导入服务器模块并在进程内运行"""
+        import anyio
+        from mcp.server.fastmcp import FastMCP
         
-        if params:
-            request["params"] = params
+        module_name = "_inproc_" + os.path.splitext(os.path.basename(self.server_script))[0]
+        spec = importlib.util.spec_from_file_location(module_name, self.server_script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
         
-        # 发送请求
-        request_json = json.dumps(request) + "\n"
-        self.process.stdin.write(request_json.encode())
-        await self.process.stdin.drain()
+        server = getattr(module, "mcp", None)
+        if not isinstance(server, FastMCP):
+            raise RuntimeError(f"服务器脚本中没有FastMCP实例: {self.server_script}")
+        lowlevel_server = server._mcp_server
         
-        # 读取响应
-        response_line = await self.process.stdout.readline()
-        response = json.loads(response_line.decode().strip())
+        self._to_server, server_read = anyio.create_memory_object_stream(_INPROC_BUFFER)
+        server_write, from_server = anyio.create_memory_object_stream(_INPROC_BUFFER)
         
-        if "error" in response:
-            raise RuntimeError(f"MCP错误: {response['error']}")
+        self._server_task = asyncio.create_task(lowlevel_server.run(
+            server_read, server_write, lowlevel_server.create_initialization_options()
+        ))
+        self._reader_task = asyncio.create_task(self._memory_reader_loop(from_server))
         
-        return response
-    
-    async def list_tools(self) -> List[Dict]:
-        """获取工具列表"""
-        response = await self._send_request("tools/list")
-        return response.get("result", {}).get("tools", [])
+        await self._initialize()
     
-    async def call_tool(self, name: str, arguments: Optional[Dict] = None) -> str:
-        """调用工具"""
-        params = {"name": name}
-        if arguments:
-            params["arguments"] = arguments
-        
-        response = await self._send_request("tools/call", params)
-        result = response.get("result", {})
-        content = result.get("content", [])
+    async def stop(self):
+        """停止进程内服务器"""
+        if self._to_server is not None:
+            await self._to_server.aclose()
+            self._to_server = None
         
-        if content and len(content) > 0:
-            return content[0].get("text", "")
+        for task in (self._server_task, self._reader_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._server_task = None
+        self._reader_task = None
+    
+    @property
+    def is_running(self) -> bool:
+        """进程内服务器是否仍在运行"""
+        return self._server_task is not None and not self._server_task.done()
+    
+    async def _memory_reader_loop(self, from_server):
+        """从内存流读取服务器消息，按请求ID分发"""
+        try:
+            async for session_message in from_server:
+                if isinstance(session_message, Exception):
+                    continue
+                self._deliver(session_message.message.model_dump(
+                    by_alias=True, mode="json", exclude_none=True
+                ))
+        finally:
+            self._fail_pending()
+    
+    async def _write_messages(self, messages: List[Dict]):
+        """把JSON-RPC消息直接放入服务器的内存流"""
+        from mcp.shared.message import SessionMessage
+        from mcp.types import JSONRPCMessage
         
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        for message in messages:
+            await self._to_server.send(SessionMessage(JSONRPCMessage.model_validate(message)))
+
+def _can_run_in_process(server_script: str) -> bool:
+    """服务器是本地Python脚本且已安装提供SessionMessage的MCP SDK时，可以在进程内运行"""
+    if not (server_script.endswith(".py") and os.path.isfile(server_script)):
+        return False
+    try:
+        return importlib.util.find_spec("mcp.shared.message") is not None
+    except ModuleNotFoundError:
+        return False
+
+async def start_mcp_client(server_script: str, in_process: bool = _IN_PROCESS) -> SimpleMCPClient:
+    """
+    启动MCP客户端
+    
+    默认以子进程方式启动服务器。in_process为True时尝试在进程内运行服务器，
+    失败时记录警告并回退到子进程方式。
+    """
+    if in_process and _can_run_in_process(server_script):
+        client = InProcessMCPClient(server_script)
+        try:
+            await client.start()
+            return client
+        except Exception as e:
+            logger.warning("进程内启动MCP服务器失败，改用子进程: %r", e, exc_info=True)
+            await client.stop()
+    
+    client = SimpleMCPClient(server_script)
+    await client.start()
+    return client
+
+class MCPSessionPool(BaseSessionPool):
+    """MCP客户端连接池，按服务器脚本复用已初始化的客户端"""
+    
+    __slots__ = ()
+    
+    async def _connect(self, server_script: str) -> SimpleMCPClient:
+        """启动服务器脚本对应的MCP客户端"""
+        return await start_mcp_client(server_script)
+
+# 进程内共享的连接池
+_POOL = MCPSessionPool()
+
+def _build_query_intent(user_input: str) -> Optional[Dict[str, Any]]:
+    """查询意图：提取数量"""
+    # 只需要第一个数字，search命中即停止，不生成全部匹配的列表
+    number = NUM_RE.search(user_input)
+    limit = int(number.group()) if number else 10
+    
+    return {
+        "action": "query",
+        "tool": "query_data",
+        "arguments": {"limit": limit}
+    }
+
+def _build_save_intent(user_input: str) -> Optional[Dict[str, Any]]:
+    """处理保存意图：提取引号中的文本和标识"""
+    text_matches = QUOTED_RE.findall(user_input)
+    if not text_matches:
+        return None
+    
+    original_text = text_matches[0]
+    marker = text_matches[1] if len(text_matches) >= 2 else "[已处理]"
+    
+    return {
+        "action": "process_save",
+        "tool": "process_and_save",
+        "arguments": {
+            "original_text": original_text,
+            "marker": marker
+        }
+    }
+
+# 意图关键词到参数提取函数的映射，按顺序匹配
+_INTENT_TABLE = (
+    (_QUERY_RE, _build_query_intent),
+    (_SAVE_RE, _build_save_intent),
+)
+
+_parse_intent = make_intent_parser(_INTENT_TABLE)
 
 class QwenMCPAgent:
     """集成Qwen模型的MCP代理（简化版）"""
     
-    def __init__(self, mcp_client: SimpleMCPClient):
-        self.mcp_client = mcp_client
+    __slots__ = ("server_script", "pool", "mcp_client", "tools", "_formatters")
+    
+    def __init__(self, server_script: str, pool: Optional[MCPSessionPool] = None):
+        self.server_script = server_script
+        self.pool = pool if pool is not None else _POOL
+        self.mcp_client: Optional[SimpleMCPClient] = None
         self.tools = []
+        # 意图动作到结果格式化方法的映射
+        self._formatters = {
+            "query": self._format_query_result,
+            "process_save": self._format_save_result,
+        }
     
     async def initialize(self):
         """初始化代理"""
-        await self.mcp_client.start()
+        # 从连接池获取MCP客户端，服务器已启动时直接复用
+        self.mcp_client = await self.pool.acquire(self.server_script)
         self.tools = await self.mcp_client.list_tools()
         print(f"发现 {len(self.tools)} 个工具:")
         for tool in self.tools:
             print(f"  - {tool['name']}: {tool.get('description', '无描述')}")
     
     async def shutdown(self):
-        """关闭代理"""
-        await self.mcp_client.stop()
+        """关闭代理（MCP服务器由连接池统一管理，这里不停止）"""
+        self.mcp_client = None
     
     def _parse_user_input(self, user_input: str) -> Dict[str, Any]:
         """解析用户输入（简化的意图识别）"""
-        user_input_lower = user_input.lower()
-        
-        # 查询意图
-        if any(keyword in user_input_lower for keyword in ['查询', '查看', '显示', '数据']):
-            # 提取数量
-            numbers = re.findall(r'\d+', user_input)
-            limit = int(numbers[0]) if numbers else 10
-            
-            return {
-                "action": "query",
-                "tool": "query_data",
-                "arguments": {"limit": limit}
-            }
-        
-        # 处理保存意图
-        elif any(keyword in user_input_lower for keyword in ['添加', '处理', '保存', '标识']):
-            # 提取引号中的文本
-            text_matches = re.findall(r'[\'\"](.*?)[\'\"]', user_input)
-            
-            if len(text_matches) >= 1:
-                original_text = text_matches[0]
-                marker = text_matches[1] if len(text_matches) >= 2 else "[已处理]"
-                
-                return {
-                    "action": "process_save",
-                    "tool": "process_and_save",
-                    "arguments": {
-                        "original_text": original_text,
-                        "marker": marker
-                    }
-                }
-        
-        return {"action": "unknown", "tool": None, "arguments": {}}
+        action, tool, arguments = _parse_intent(user_input)
+        return {"action": action, "tool": tool, "arguments": dict(arguments)}
     
     async def process_input(self, user_input: str) -> str:
         """处理用户输入"""
@@ -162,14 +263,10 @@ class QwenMCPAgent:
             )
             
             # 解析并格式化结果
-            result_data = json.loads(result)
-            
-            if intent["action"] == "query":
-                return self._format_query_result(result_data)
-            elif intent["action"] == "process_save":
-                return self._format_save_result(result_data)
-            
-            return result
+            formatter = self._formatters.get(intent["action"])
+            if formatter is None:
+                return result
+            return formatter(orjson.loads(result))
             
         except Exception as e:
             return f"处理请求时发生错误: {str(e)}"
@@ -185,15 +282,16 @@ class QwenMCPAgent:
         if count == 0:
             return "📭 未查询到任何数据"
         
-        response = f"✅ 成功查询到 {count} 条数据:\n\n"
-        
+        parts = [f"✅ 成功查询到 {count} 条数据:\n\n"]
         for i, item in enumerate(data_list, 1):
-            response += f"📄 数据 {i}:\n"
-            response += f"   原始文本: {item.get('source_text', '无')}\n"
-            response += f"   处理结果: {item.get('result_text', '无')}\n"
-            response += f"   创建时间: {item.get('create_time', '无')}\n\n"
+            parts.append(
+                f"📄 数据 {i}:\n"
+                f"   原始文本: {item.get('source_text', '无')}\n"
+                f"   处理结果: {item.get('result_text', '无')}\n"
+                f"   创建时间: {item.get('create_time', '无')}\n\n"
+            )
         
-        return response
+        return "".join(parts)
     
     def _format_save_result(self, result_data: Dict) -> str:
         """格式化保存结果"""
@@ -214,9 +312,8 @@ async def main():
     print("🚀 标准MCP简道云数据处理客户端")
     print("=" * 60)
     
-    # 创建MCP客户端和代理
-    mcp_client = SimpleMCPClient("mcp_server_final.py")
-    agent = QwenMCPAgent(mcp_client)
+    # 创建代理，MCP客户端由连接池提供
+    agent = QwenMCPAgent("mcp_server_final.py")
     
     try:
         # 初始化
@@ -232,7 +329,7 @@ async def main():
         # 交互循环
         while True:
             try:
-                user_input = input("用户: ").strip()
+                user_input = (await ainput("用户: ")).strip()
                 
                 if user_input.lower() in ['quit', 'exit', '退出']:
                     print("再见! 👋")
@@ -241,10 +338,10 @@ async def main():
                 if not user_input:
                     continue
                 
-                print("助手: ", end="", flush=True)
                 response = await agent.process_input(user_input)
-                print(response)
-                print()
+                # 整条回复拼好后一次写出
+                sys.stdout.write(f"助手: {response}\n\n")
+                sys.stdout.flush()
                 
             except KeyboardInterrupt:
                 print("\n\n程序被用户中断")
@@ -255,7 +352,9 @@ async def main():
     finally:
         # 清理资源
         await agent.shutdown()
+        await _POOL.close_all()
         print("🔚 MCP服务器已停止")
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
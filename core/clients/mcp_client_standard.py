@@ -6,44 +6,62 @@
 
 import asyncio
 import json
-import subprocess
 import sys
 import os
-from typing import Any, Dict, List, Optional, AsyncGenerator
+import re
+from functools import partial
+from typing import Any, Dict, List, Optional, AsyncGenerator, Tuple
 import logging
 
+import orjson
+
+# 动态添加core/src到Python路径，以便导入mcp_jiandaoyun中的公共模块
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+src_path = os.path.join(project_root, 'core', 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from mcp_jiandaoyun.console import ainput
+from mcp_jiandaoyun.event_loop import install_uvloop
+from mcp_jiandaoyun.intent import NUM_RE, QUOTED_RE, make_intent_parser
+from mcp_jiandaoyun.pipeline_client import MCPSessionPool as BaseSessionPool, PROTOCOL_VERSION, PipelinedMCPClient
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class MCPClient:
+# 预编码的初始化请求帧（%d处填入请求ID）和initialized通知帧
+_INITIALIZE_FRAME = (
+    b'{"jsonrpc":"2.0","id":%d,"method":"initialize","params":'
+    + orjson.dumps({
+        "protocolVersion": PROTOCOL_VERSION,
+        "capabilities": {
+            "tools": {},
+            "resources": {}
+        },
+        "clientInfo": {
+            "name": "JianDaoYun MCP Client",
+            "version": "1.0.0"
+        }
+    })
+    + b'}\n'
+)
+_INITIALIZED_FRAME = orjson.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + b"\n"
+
+# 意图关键词合并为一个正则，单次扫描完成匹配（关键词都是中文，不需要先转小写）
+_QUERY_RE = re.compile('查询|查看|显示|获取|数据')
+_SAVE_RE = re.compile('添加|处理|保存|标识')
+
+class MCPClient(PipelinedMCPClient):
     """标准MCP客户端"""
     
-    def __init__(self, server_command: List[str]):
-        """
-        初始化MCP客户端
-        
-        Args:
-            server_command: 启动MCP服务器的命令列表
-        """
-        self.server_command = server_command
-        self.process = None
-        self.request_id = 0
-        
+    __slots__ = ()
+    
     async def start_server(self):
         """启动MCP服务器进程"""
         try:
-            self.process = await asyncio.create_subprocess_exec(
-                *self.server_command,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            await self.start()
             logger.info(f"MCP服务器已启动: {' '.join(self.server_command)}")
-            
-            # 发送初始化请求
-            await self.initialize()
-            
         except Exception as e:
             logger.error(f"启动MCP服务器失败: {e}")
             raise
@@ -51,110 +69,33 @@ class MCPClient:
     async def stop_server(self):
         """停止MCP服务器进程"""
         if self.process:
-            self.process.terminate()
-            await self.process.wait()
+            await self.stop()
             logger.info("MCP服务器已停止")
     
-    def _get_next_id(self) -> int:
-        """获取下一个请求ID"""
-        self.request_id += 1
-        return self.request_id
-    
-    async def _send_request(self, method: str, params: Optional[Dict] = None) -> Dict:
-        """
-        发送JSON-RPC请求到MCP服务器
-        
-        Args:
-            method: RPC方法名
-            params: 请求参数
-            
-        Returns:
-            服务器响应
-        """
-        if not self.process:
-            raise RuntimeError("MCP服务器未启动")
-        
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._get_next_id(),
-            "method": method
-        }
-        
-        if params:
-            request["params"] = params
-        
-        # 发送请求
-        request_json = json.dumps(request) + "\n"
-        self.process.stdin.write(request_json.encode())
-        await self.process.stdin.drain()
-        
-        logger.debug(f"发送请求: {request}")
-        
-        # 读取响应
-        response_line = await self.process.stdout.readline()
-        if not response_line:
-            raise RuntimeError("从MCP服务器读取响应失败")
-        
-        response = json.loads(response_line.decode().strip())
-        logger.debug(f"收到响应: {response}")
-        
-        if "error" in response:
-            raise RuntimeError(f"MCP服务器错误: {response['error']}")
-        
-        return response
+    async def _initialize(self):
+        """执行MCP初始化握手"""
+        await self.initialize()
     
     async def initialize(self):
         """初始化MCP连接"""
-        response = await self._send_request("initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {
-                "tools": {},
-                "resources": {}
-            },
-            "clientInfo": {
-                "name": "JianDaoYun MCP Client",
-                "version": "1.0.0"
-            }
-        })
+        # 初始化请求除ID外都是固定内容，使用预编码的请求帧
+        request_id = self._next_id()
+        responses = await self._roundtrip([request_id], partial(self._write, _INITIALIZE_FRAME % request_id))
+        response = responses[0]
+        
+        # 服务器收到initialized通知后才会处理其他请求
+        await self._write(_INITIALIZED_FRAME)
         
         logger.info("MCP连接初始化成功")
         return response
     
-    async def list_tools(self) -> List[Dict]:
-        """获取可用工具列表"""
-        response = await self._send_request("tools/list")
-        return response.get("result", {}).get("tools", [])
-    
-    async def call_tool(self, name: str, arguments: Optional[Dict] = None) -> str:
-        """
-        调用MCP工具
-        
-        Args:
-            name: 工具名称
-            arguments: 工具参数
-            
-        Returns:
-            工具执行结果
-        """
-        params = {"name": name}
-        if arguments:
-            params["arguments"] = arguments
-        
-        response = await self._send_request("tools/call", params)
-        
-        # 提取工具结果
-        result = response.get("result", {})
-        content = result.get("content", [])
-        
-        if content and len(content) > 0:
-            return content[0].get("text", "")
-        
-        return json.dumps(result, ensure_ascii=False, indent=2)
-    
     async def list_resources(self) -> List[Dict]:
         """获取可用资源列表"""
         response = await self._send_request("resources/list")
-        return response.get("result", {}).get("resources", [])
+        try:
+            return response["result"]["resources"]
+        except KeyError:
+            return []
     
     async def read_resource(self, uri: str) -> str:
         """
@@ -168,43 +109,154 @@ class MCPClient:
         """
         response = await self._send_request("resources/read", {"uri": uri})
         
+        # 符合规范的响应直接取第一个内容的文本，不构造默认值
+        try:
+            return response["result"]["contents"][0]["text"]
+        except (KeyError, IndexError):
+            pass
+        
         result = response.get("result", {})
         contents = result.get("contents", [])
         
-        if contents and len(contents) > 0:
+        if contents:
             return contents[0].get("text", "")
         
         return json.dumps(result, ensure_ascii=False, indent=2)
 
+class MCPSessionPool(BaseSessionPool):
+    """MCP客户端连接池，按服务器启动命令复用已初始化的客户端"""
+    
+    __slots__ = ()
+    
+    async def _connect(self, key: Tuple[str, ...]) -> MCPClient:
+        """启动命令对应的MCP客户端"""
+        client = MCPClient(key)
+        await client.start_server()
+        return client
+    
+    async def acquire(self, server_command: List[str]) -> MCPClient:
+        """
+        获取共享的MCP客户端
+        
+        Args:
+            server_command: 启动MCP服务器的命令列表
+            
+        Returns:
+            已启动并完成初始化的MCP客户端
+        """
+        return await super().acquire(tuple(server_command))
+
+# 进程内共享的连接池
+_POOL = MCPSessionPool()
+
+def _build_query_intent(user_input: str) -> Optional[Dict[str, Any]]:
+    """查询意图：提取数量限制"""
+    limit = 10
+    if '条' in user_input:
+        # 只需要第一个数字，search命中即停止，不生成全部匹配的列表
+        number = NUM_RE.search(user_input)
+        if number:
+            limit = int(number.group())
+    
+    return {
+        "action": "query",
+        "tool": "query_jiandaoyun_data",
+        "arguments": {"limit": limit}
+    }
+
+def _build_save_intent(user_input: str) -> Optional[Dict[str, Any]]:
+    """处理保存意图：查找引号中的文本和标识"""
+    text_matches = QUOTED_RE.findall(user_input)
+    if not text_matches:
+        return None
+    
+    original_text = text_matches[0]
+    custom_marker = text_matches[1] if len(text_matches) >= 2 else "[已处理]"
+    
+    return {
+        "action": "process_save",
+        "tool": "process_and_save_to_jiandaoyun",
+        "arguments": {
+            "original_text": original_text,
+            "custom_marker": custom_marker
+        }
+    }
+
+# 意图关键词到参数提取函数的映射，按顺序匹配
+_INTENT_TABLE = (
+    (_QUERY_RE, _build_query_intent),
+    (_SAVE_RE, _build_save_intent),
+)
+
+_parse_intent = make_intent_parser(_INTENT_TABLE)
+
 class QwenMCPAgent:
     """集成Qwen模型的MCP客户端代理"""
     
-    def __init__(self, mcp_client: MCPClient):
+    __slots__ = (
+        "servers", "pool", "mcp_client", "tool_registry",
+        "available_tools", "conversation_history", "_formatters"
+    )
+    
+    def __init__(
+        self,
+        server_command: List[str],
+        pool: Optional[MCPSessionPool] = None,
+        extra_servers: Optional[Dict[str, List[str]]] = None
+    ):
         """
         初始化Qwen MCP代理
         
         Args:
-            mcp_client: MCP客户端实例
+            server_command: 启动主MCP服务器的命令列表
+            pool: MCP客户端连接池，默认使用进程内共享的连接池
+            extra_servers: 额外的MCP服务器，名称到启动命令的映射
         """
-        self.mcp_client = mcp_client
+        self.servers: Dict[str, List[str]] = {"default": server_command}
+        if extra_servers:
+            self.servers.update(extra_servers)
+        self.pool = pool if pool is not None else _POOL
+        self.mcp_client: Optional[MCPClient] = None
+        # 工具名到 (服务器名称, MCP客户端) 的映射，调用工具时按名称路由
+        self.tool_registry: Dict[str, Tuple[str, MCPClient]] = {}
         self.available_tools = []
         self.conversation_history = []
+        # 意图动作到结果格式化方法的映射
+        self._formatters = {
+            "query": self._format_query_result,
+            "process_save": self._format_save_result,
+        }
+    
+    async def _connect(self, server_command: List[str]) -> Tuple[MCPClient, List[Dict]]:
+        """连接一个MCP服务器并获取其工具列表"""
+        # 从连接池获取MCP客户端，服务器进程已启动时直接复用
+        client = await self.pool.acquire(server_command)
+        return client, await client.list_tools()
     
     async def initialize(self):
         """初始化代理"""
-        # 启动MCP服务器
-        await self.mcp_client.start_server()
+        # 所有服务器同时启动和握手，总耗时取决于最慢的一个
+        connections = await asyncio.gather(
+            *(self._connect(server_command) for server_command in self.servers.values())
+        )
         
-        # 获取可用工具
-        self.available_tools = await self.mcp_client.list_tools()
+        self.tool_registry = {}
+        self.available_tools = []
+        for name, (client, tools) in zip(self.servers, connections):
+            for tool in tools:
+                # 同名工具以先声明的服务器为准
+                self.tool_registry.setdefault(tool.get("name"), (name, client))
+            self.available_tools.extend(tools)
+        self.mcp_client = connections[0][0]
         logger.info(f"发现 {len(self.available_tools)} 个可用工具")
         
         for tool in self.available_tools:
             logger.info(f"- {tool.get('name')}: {tool.get('description', '无描述')}")
     
     async def shutdown(self):
-        """关闭代理"""
-        await self.mcp_client.stop_server()
+        """关闭代理（MCP服务器进程由连接池统一管理，这里不停止）"""
+        self.mcp_client = None
+        self.tool_registry = {}
     
     def _analyze_user_intent(self, user_input: str) -> Dict[str, Any]:
         """
@@ -216,49 +268,11 @@ class QwenMCPAgent:
         Returns:
             意图分析结果
         """
-        user_input_lower = user_input.lower()
-        
-        # 查询意图
-        if any(keyword in user_input_lower for keyword in ['查询', '查看', '显示', '获取', '数据']):
-            # 提取数量限制
-            limit = 10
-            if '条' in user_input:
-                import re
-                numbers = re.findall(r'\d+', user_input)
-                if numbers:
-                    limit = int(numbers[0])
-            
-            return {
-                "action": "query",
-                "tool": "query_jiandaoyun_data",
-                "arguments": {"limit": limit}
-            }
-        
-        # 处理保存意图
-        elif any(keyword in user_input_lower for keyword in ['添加', '处理', '保存', '标识']):
-            # 提取文本和标识
-            import re
-            
-            # 查找引号中的文本
-            text_matches = re.findall(r'[\'\"](.*?)[\'\"]', user_input)
-            
-            if len(text_matches) >= 1:
-                original_text = text_matches[0]
-                custom_marker = text_matches[1] if len(text_matches) >= 2 else "[已处理]"
-                
-                return {
-                    "action": "process_save",
-                    "tool": "process_and_save_to_jiandaoyun",
-                    "arguments": {
-                        "original_text": original_text,
-                        "custom_marker": custom_marker
-                    }
-                }
-        
+        action, tool, arguments = _parse_intent(user_input)
         return {
-            "action": "unknown",
-            "tool": None,
-            "arguments": {}
+            "action": action,
+            "tool": tool,
+            "arguments": dict(arguments)
         }
     
     async def process_user_input(self, user_input: str) -> str:
@@ -278,21 +292,18 @@ class QwenMCPAgent:
             return "抱歉，我无法理解您的请求。请尝试：\n1. '查询简道云数据' 或 '查看最近5条数据'\n2. '给\"文本\"添加\"[标识]\"并保存'"
         
         try:
-            # 调用相应的MCP工具
-            result = await self.mcp_client.call_tool(
+            # 调用相应的MCP工具，按工具名路由到提供它的服务器
+            _, client = self.tool_registry.get(intent["tool"], (None, self.mcp_client))
+            result = await client.call_tool(
                 intent["tool"], 
                 intent["arguments"]
             )
             
-            # 解析结果
-            result_data = json.loads(result)
-            
-            if intent["action"] == "query":
-                return self._format_query_result(result_data)
-            elif intent["action"] == "process_save":
-                return self._format_save_result(result_data)
-            
-            return result
+            # 解析并格式化结果
+            formatter = self._formatters.get(intent["action"])
+            if formatter is None:
+                return result
+            return formatter(orjson.loads(result))
             
         except Exception as e:
             logger.error(f"处理用户输入失败: {e}")
@@ -309,15 +320,16 @@ class QwenMCPAgent:
         if count == 0:
             return "未查询到任何数据。"
         
-        response = f"成功查询到 {count} 条数据：\n\n"
-        
+        parts = [f"成功查询到 {count} 条数据：\n\n"]
         for i, item in enumerate(data_list, 1):
-            response += f"📄 数据 {i}:\n"
-            response += f"   原始文本: {item.get('source_text', '无')}\n"
-            response += f"   处理结果: {item.get('result_text', '无')}\n"
-            response += f"   创建时间: {item.get('create_time', '无')}\n\n"
+            parts.append(
+                f"📄 数据 {i}:\n"
+                f"   原始文本: {item.get('source_text', '无')}\n"
+                f"   处理结果: {item.get('result_text', '无')}\n"
+                f"   创建时间: {item.get('create_time', '无')}\n\n"
+            )
         
-        return response
+        return "".join(parts)
     
     def _format_save_result(self, result_data: Dict) -> str:
         """格式化保存结果"""
@@ -337,12 +349,9 @@ async def main():
     print("=== 标准MCP简道云数据处理客户端 ===")
     print("正在启动MCP服务器...")
     
-    # 创建MCP客户端
+    # 创建Qwen MCP代理，MCP客户端由连接池提供
     server_command = [sys.executable, "mcp_server_standard.py"]
-    mcp_client = MCPClient(server_command)
-    
-    # 创建Qwen MCP代理
-    agent = QwenMCPAgent(mcp_client)
+    agent = QwenMCPAgent(server_command)
     
     try:
         # 初始化
@@ -357,7 +366,7 @@ async def main():
         # 交互循环
         while True:
             try:
-                user_input = input("用户: ").strip()
+                user_input = (await ainput("用户: ")).strip()
                 
                 if user_input.lower() in ['quit', 'exit', '退出', 'q']:
                     print("再见！")
@@ -366,10 +375,10 @@ async def main():
                 if not user_input:
                     continue
                 
-                print("助手: ", end="", flush=True)
                 response = await agent.process_user_input(user_input)
-                print(response)
-                print()
+                # 整条回复拼好后一次写出
+                sys.stdout.write(f"助手: {response}\n\n")
+                sys.stdout.flush()
                 
             except KeyboardInterrupt:
                 print("\n\n程序被用户中断。")
@@ -380,6 +389,8 @@ async def main():
     finally:
         # 清理资源
         await agent.shutdown()
+        await _POOL.close_all()
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
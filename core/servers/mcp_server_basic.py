@@ -20,12 +20,16 @@
 """
 
 import asyncio  # 异步编程支持
-import json     # JSON数据处理
 import logging  # 日志记录
+import logging.handlers  # 队列日志处理器
 import os       # 操作系统接口
+import queue    # 日志队列
 import sys      # 系统相关参数和函数
+from functools import lru_cache  # 结果缓存
 from typing import Any, Dict, List, Optional, Sequence  # 类型注解
 
+import orjson    # 高性能JSON序列化
+
 # 动态添加项目根目录到Python路径
 # 这样可以确保无论从哪里运行脚本都能正确导入模块
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -40,17 +44,34 @@ from mcp.types import (
 )
 import mcp.server.stdio
 
+from mcp_jiandaoyun.event_loop import install_uvloop
 from mcp_jiandaoyun.jiandaoyun_client import JianDaoYunClient
 from mcp_jiandaoyun.data_processor import DataProcessor
 
+# ==================== JSON序列化 ====================
+
+def _dumps(data: Any) -> str:
+    """
+    把工具结果序列化为JSON文本
+    
+    使用orjson序列化，输出紧凑格式并保留中文原文；允许非字符串的字典键，与json.dumps的行为一致。
+    """
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
 # ==================== 日志配置 ====================
 # 配置日志系统，记录服务器运行状态和调试信息
+# 事件循环中只把日志记录放入内存队列，由后台线程（QueueListener）写入日志文件，避免磁盘I/O阻塞工具调用
+_log_file_handler = logging.FileHandler('mcp_server_basic.log', mode='a')  # 追加模式写入日志文件
+_log_file_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')  # 日志格式
+)
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,                                          # 日志级别：INFO及以上
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # 日志格式
-    filename='mcp_server_basic.log',                             # 日志文件名
-    filemode='a'                                                 # 追加模式
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+# 后台日志监听器，在main()中启动和停止
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler)
 logger = logging.getLogger(__name__)  # 获取当前模块的日志记录器
 
 # ==================== MCP服务器初始化 ====================
@@ -65,6 +86,53 @@ jiandaoyun_client = JianDaoYunClient()
 # 初始化数据处理器，负责文本处理和格式化
 data_processor = DataProcessor()
 
+# ==================== 工具和资源定义 ====================
+# 工具和资源列表是固定内容，模块加载时创建一次，每次请求直接返回
+_TOOLS = [
+    Tool(
+        name="query_jiandaoyun_data",
+        description="查询简道云数据",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "limit": {
+                    "type": "integer",
+                    "description": "查询返回的数据条数限制",
+                    "default": 10
+                }
+            }
+        }
+    ),
+    Tool(
+        name="process_and_save_to_jiandaoyun",
+        description="处理文本并保存到简道云",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "original_text": {
+                    "type": "string",
+                    "description": "需要处理的原始文本"
+                },
+                "custom_marker": {
+                    "type": "string",
+                    "description": "自定义标识",
+                    "default": "[已处理]"
+                }
+            },
+            "required": ["original_text"]
+        }
+    )
+]
+
+_RESOURCES = [
+    Resource(
+        uri="config://jiandaoyun/settings",
+        name="简道云配置",
+        description="简道云连接和配置信息",
+        mimeType="application/json"
+    )
+]
+
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
     """
@@ -72,41 +140,7 @@ async def handle_list_tools() -> List[Tool]:
     """
     logger.info("处理工具列表请求")
     
-    return [
-        Tool(
-            name="query_jiandaoyun_data",
-            description="查询简道云数据",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {
-                        "type": "integer",
-                        "description": "查询返回的数据条数限制",
-                        "default": 10
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="process_and_save_to_jiandaoyun",
-            description="处理文本并保存到简道云",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "original_text": {
-                        "type": "string",
-                        "description": "需要处理的原始文本"
-                    },
-                    "custom_marker": {
-                        "type": "string",
-                        "description": "自定义标识",
-                        "default": "[已处理]"
-                    }
-                },
-                "required": ["original_text"]
-            }
-        )
-    ]
+    return _TOOLS
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
@@ -116,12 +150,10 @@ async def handle_call_tool(name: str, arguments: dict) -> Sequence[TextContent |
     logger.info(f"处理工具调用: {name}, 参数: {arguments}")
     
     try:
-        if name == "query_jiandaoyun_data":
-            return await handle_query_tool(arguments)
-        elif name == "process_and_save_to_jiandaoyun":
-            return await handle_process_save_tool(arguments)
-        else:
+        handler = _TOOL_HANDLERS.get(name)
+        if handler is None:
             raise ValueError(f"未知工具: {name}")
+        return await handler(arguments)
     
     except Exception as e:
         logger.error(f"工具调用失败: {e}")
@@ -129,7 +161,13 @@ async def handle_call_tool(name: str, arguments: dict) -> Sequence[TextContent |
             "success": False,
             "error": str(e)
         }
-        return [TextContent(type="text", text=json.dumps(error_result, ensure_ascii=False, indent=2))]
+        return [TextContent(type="text", text=_dumps(error_result))]
+
+def _field_text(field_data):
+    """提取简道云字段值：带value的字典取value，其余转为字符串"""
+    if type(field_data) is dict and 'value' in field_data:
+        return field_data['value']
+    return str(field_data)
 
 async def handle_query_tool(arguments: dict) -> Sequence[TextContent]:
     """处理查询工具"""
@@ -139,34 +177,19 @@ async def handle_query_tool(arguments: dict) -> Sequence[TextContent]:
         # 查询数据
         data_list = await jiandaoyun_client.query_data(limit=limit)
         
-        # 格式化返回数据
-        formatted_data = []
-        for item in data_list:
-            # 提取字段值
-            source_value = ""
-            result_value = ""
-            
-            if jiandaoyun_client.source_field in item:
-                source_field_data = item[jiandaoyun_client.source_field]
-                if isinstance(source_field_data, dict) and 'value' in source_field_data:
-                    source_value = source_field_data['value']
-                else:
-                    source_value = str(source_field_data)
-            
-            if jiandaoyun_client.result_field in item:
-                result_field_data = item[jiandaoyun_client.result_field]
-                if isinstance(result_field_data, dict) and 'value' in result_field_data:
-                    result_value = result_field_data['value']
-                else:
-                    result_value = str(result_field_data)
-            
-            formatted_data.append({
+        # 格式化返回数据（字段名提前取到局部变量，避免循环内重复属性查找）
+        src_field = jiandaoyun_client.source_field
+        res_field = jiandaoyun_client.result_field
+        formatted_data = [
+            {
                 "data_id": item.get("_id", ""),
-                "source_text": source_value,
-                "result_text": result_value,
+                "source_text": _field_text(item[src_field]) if src_field in item else "",
+                "result_text": _field_text(item[res_field]) if res_field in item else "",
                 "create_time": item.get("createTime", ""),
                 "update_time": item.get("updateTime", "")
-            })
+            }
+            for item in data_list
+        ]
         
         result = {
             "success": True,
@@ -176,7 +199,7 @@ async def handle_query_tool(arguments: dict) -> Sequence[TextContent]:
         }
         
         logger.info(f"查询成功，返回 {len(formatted_data)} 条数据")
-        return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+        return [TextContent(type="text", text=_dumps(result))]
         
     except Exception as e:
         error_msg = f"查询数据失败: {str(e)}"
@@ -189,7 +212,7 @@ async def handle_query_tool(arguments: dict) -> Sequence[TextContent]:
             "data": []
         }
         
-        return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+        return [TextContent(type="text", text=_dumps(result))]
 
 async def handle_process_save_tool(arguments: dict) -> Sequence[TextContent]:
     """处理保存工具"""
@@ -197,17 +220,16 @@ async def handle_process_save_tool(arguments: dict) -> Sequence[TextContent]:
     custom_marker = arguments.get("custom_marker", "[已处理]")
     
     try:
-        # 验证输入
-        if not data_processor.validate_text(original_text):
+        # 验证输入（与validate_text规则相同，直接判断，省去方法调用和逐条日志）
+        if not original_text or not original_text.strip():
             raise ValueError("输入文本无效")
         
-        # 处理文本：添加标识
-        if custom_marker == "[已处理]":
-            # 使用默认处理方法（包含时间戳）
-            processed_text = data_processor.add_processed_marker(original_text, add_timestamp=True)
-        else:
-            # 使用自定义标识
-            processed_text = f"{custom_marker} {original_text}"
+        # 处理文本：默认标识使用包含时间戳的处理方法，自定义标识直接拼接
+        processed_text = (
+            data_processor.add_processed_marker(original_text, add_timestamp=True)
+            if custom_marker == "[已处理]"
+            else f"{custom_marker} {original_text}"
+        )
         
         logger.info(f"处理后文本: {processed_text}")
         
@@ -224,7 +246,7 @@ async def handle_process_save_tool(arguments: dict) -> Sequence[TextContent]:
         }
         
         logger.info("数据处理和保存成功")
-        return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+        return [TextContent(type="text", text=_dumps(result))]
         
     except Exception as e:
         error_msg = f"处理和保存失败: {str(e)}"
@@ -238,7 +260,13 @@ async def handle_process_save_tool(arguments: dict) -> Sequence[TextContent]:
             "custom_marker": custom_marker
         }
         
-        return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+        return [TextContent(type="text", text=_dumps(result))]
+
+# 工具名称到处理函数的映射，调用时按名称直接查表分发
+_TOOL_HANDLERS = {
+    "query_jiandaoyun_data": handle_query_tool,
+    "process_and_save_to_jiandaoyun": handle_process_save_tool
+}
 
 @server.list_resources()
 async def handle_list_resources() -> List[Resource]:
@@ -247,14 +275,40 @@ async def handle_list_resources() -> List[Resource]:
     """
     logger.info("处理资源列表请求")
     
-    return [
-        Resource(
-            uri="config://jiandaoyun/settings",
-            name="简道云配置",
-            description="简道云连接和配置信息",
-            mimeType="application/json"
-        )
-    ]
+    return _RESOURCES
+
+@lru_cache(maxsize=1)
+def _config_json() -> str:
+    """
+    生成配置资源的JSON文本
+    
+    简道云客户端的配置在服务器启动后不再变化，只序列化一次。
+    """
+    config = {
+        "server_info": {
+            "name": "JianDaoYun Basic MCP Server",
+            "version": "1.0.0",
+            "description": "基础MCP协议实现的简道云数据处理服务器"
+        },
+        "api_endpoints": {
+            "query": jiandaoyun_client.query_url,
+            "create": jiandaoyun_client.create_url
+        },
+        "app_config": {
+            "app_id": jiandaoyun_client.app_id,
+            "entry_id": jiandaoyun_client.entry_id
+        },
+        "field_mapping": {
+            "source_field": jiandaoyun_client.source_field,
+            "result_field": jiandaoyun_client.result_field
+        },
+        "available_tools": [
+            "query_jiandaoyun_data - 查询简道云数据",
+            "process_and_save_to_jiandaoyun - 处理文本并保存到简道云"
+        ]
+    }
+    
+    return _dumps(config)
 
 @server.read_resource()
 async def handle_read_resource(uri: str) -> str:
@@ -264,37 +318,14 @@ async def handle_read_resource(uri: str) -> str:
     logger.info(f"处理资源读取请求: {uri}")
     
     if uri == "config://jiandaoyun/settings":
-        config = {
-            "server_info": {
-                "name": "JianDaoYun Basic MCP Server",
-                "version": "1.0.0",
-                "description": "基础MCP协议实现的简道云数据处理服务器"
-            },
-            "api_endpoints": {
-                "query": jiandaoyun_client.query_url,
-                "create": jiandaoyun_client.create_url
-            },
-            "app_config": {
-                "app_id": jiandaoyun_client.app_id,
-                "entry_id": jiandaoyun_client.entry_id
-            },
-            "field_mapping": {
-                "source_field": jiandaoyun_client.source_field,
-                "result_field": jiandaoyun_client.result_field
-            },
-            "available_tools": [
-                "query_jiandaoyun_data - 查询简道云数据",
-                "process_and_save_to_jiandaoyun - 处理文本并保存到简道云"
-            ]
-        }
-        
-        return json.dumps(config, ensure_ascii=False, indent=2)
+        return _config_json()
     
     else:
         raise ValueError(f"未知资源: {uri}")
 
 async def main():
     """主函数"""
+    _log_listener.start()
     logger.info("启动基础MCP简道云服务器...")
     
     try:
@@ -308,6 +339,10 @@ async def main():
     except Exception as e:
         logger.error(f"服务器运行失败: {e}")
         sys.exit(1)
+    finally:
+        # 写出队列中剩余的日志
+        _log_listener.stop()
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
@@ -52,6 +52,7 @@ sys.path.insert(0, src_path)
 from mcp.server.fastmcp import FastMCP
 
 # 导入重构后的模块
+from mcp_jiandaoyun.event_loop import install_uvloop
 from mcp_jiandaoyun.config import get_config, AppConfig
 from mcp_jiandaoyun.jiandaoyun_client import JianDaoYunClient, IJianDaoYunClient
 from mcp_jiandaoyun.image_processor import ImageProcessor, QwenVisionClient, IImageProcessor, IVisionClient
@@ -194,7 +195,7 @@ def _create_error_response(
 # ==================== MCP工具定义 ====================
 
 @mcp.tool()
-async def query_image_data(limit: int = 5) -> str:
+async def query_image_data(limit: int = 5, record_ids: Optional[List[str]] = None) -> str:
     """
     查询包含图片的简道云数据工具 (优化版)
 
@@ -210,11 +211,12 @@ async def query_image_data(limit: int = 5) -> str:
 
     Args:
         limit: 查询返回的数据条数限制，默认为5条（建议不超过10条）
+        record_ids: 只返回这些记录ID对应的数据（可选），逐页查找直到全部找到，最多返回limit条
 
     Returns:
         str: JSON格式的查询结果，包含图片URL和识别结果
     """
-    logger.info(f"🔍 MCP工具调用: query_image_data, 限制条数: {limit}")
+    logger.info(f"🔍 MCP工具调用: query_image_data, 限制条数: {limit}, 指定记录: {len(record_ids or [])}个")
 
     try:
         # 获取服务管理器和客户端
@@ -225,7 +227,10 @@ async def query_image_data(limit: int = 5) -> str:
 
         # 调用客户端查询图片数据
         logger.info("📡 开始查询简道云图片数据...")
-        data_list = await client.query_image_data(limit=limit)
+        if record_ids:
+            data_list = await client.query_image_data_by_ids(record_ids[:limit])
+        else:
+            data_list = await client.query_image_data(limit=limit)
         logger.info(f"📊 查询到 {len(data_list)} 条原始数据")
 
         # 格式化返回数据
@@ -277,7 +282,7 @@ async def query_image_data(limit: int = 5) -> str:
         }
 
         logger.info(f"✅ 查询成功，返回 {len(formatted_data)} 条格式化数据")
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
 
     except (JianDaoYunException, NetworkException) as e:
         # 业务异常，返回详细错误信息
@@ -299,7 +304,7 @@ async def query_image_data(limit: int = 5) -> str:
         }
 
         logger.error(f"❌ 业务异常: {e.error_code.value} - {e.message}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
     except Exception as e:
         # 未知异常，包装为MCP异常
@@ -327,7 +332,7 @@ async def query_image_data(limit: int = 5) -> str:
         }
 
         logger.error(f"💥 未知异常: {str(e)}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
 @mcp.tool()
 async def recognize_and_update(
@@ -381,15 +386,9 @@ async def recognize_and_update(
         # 如果提供了record_id但没有image_url，尝试从记录中获取图片URL
         if record_id and not image_url:
             logger.info(f"🔍 从记录ID获取图片URL: {record_id}")
-            # 查询单条记录
-            data_list = await jiandaoyun_client.query_image_data(limit=1)
-
-            # 查找匹配的记录
-            target_record = None
-            for record in data_list:
-                if record.get('_id') == record_id:
-                    target_record = record
-                    break
+            # 按ID查询单条记录
+            data_list = await jiandaoyun_client.query_image_data_by_ids([record_id])
+            target_record = data_list[0] if data_list else None
 
             if target_record:
                 # 提取图片URL
@@ -459,7 +458,7 @@ async def recognize_and_update(
         }
 
         logger.info("🎉 图像识别和更新操作完成")
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
 
     except (ImageProcessingException, QwenVisionException, JianDaoYunException, NetworkException) as e:
         # 业务异常，返回详细错误信息
@@ -474,7 +473,7 @@ async def recognize_and_update(
         )
 
         logger.error(f"❌ 业务异常: {e.error_code.value} - {e.message}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
     except Exception as e:
         # 未知异常，包装为MCP异常
@@ -496,7 +495,7 @@ async def recognize_and_update(
         )
 
         logger.error(f"💥 未知异常: {str(e)}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
 @mcp.tool()
 async def batch_process_images(limit: int = 5, max_concurrent: int = 2) -> str:
@@ -610,7 +609,7 @@ async def batch_process_images(limit: int = 5, max_concurrent: int = 2) -> str:
                     "query_limit": limit,
                     "timestamp": _get_current_timestamp()
                 }
-            }, ensure_ascii=False, indent=2)
+            }, ensure_ascii=False)
 
         # 3. 并发处理记录
         import asyncio
@@ -683,7 +682,7 @@ async def batch_process_images(limit: int = 5, max_concurrent: int = 2) -> str:
         }
 
         logger.info(f"🎉 批量处理完成: {processed_count}/{len(unprocessed_records)} 成功")
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return json.dumps(response, ensure_ascii=False)
 
     except Exception as e:
         # 未知异常
@@ -701,7 +700,7 @@ async def batch_process_images(limit: int = 5, max_concurrent: int = 2) -> str:
         )
 
         logger.error(f"💥 批量处理异常: {str(e)}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
 @mcp.tool()
 async def get_processing_status() -> str:
@@ -775,7 +774,7 @@ async def get_processing_status() -> str:
         }
 
         logger.info(f"✅ 状态信息获取成功")
-        return json.dumps(status_response, ensure_ascii=False, indent=2)
+        return json.dumps(status_response, ensure_ascii=False)
 
     except Exception as e:
         # 未知异常
@@ -792,7 +791,7 @@ async def get_processing_status() -> str:
         )
 
         logger.error(f"💥 状态查询异常: {str(e)}")
-        return json.dumps(error_response, ensure_ascii=False, indent=2)
+        return json.dumps(error_response, ensure_ascii=False)
 
 # ==================== MCP资源定义 ====================
 
@@ -1010,6 +1009,8 @@ if __name__ == "__main__":
     logger.info(f"📡 传输方式: STDIO")
     logger.info(f"🔧 协议版本: MCP 1.0")
 
+    install_uvloop()
+
     try:
         # 使用STDIO传输，符合MCP标准
         # 这是MCP协议推荐的传输方式
@@ -17,6 +17,7 @@ src_path = os.path.join(project_root, 'core', 'src')
 sys.path.insert(0, src_path)
 
 from mcp.server.fastmcp import FastMCP
+from mcp_jiandaoyun.event_loop import install_uvloop
 from mcp_jiandaoyun.jiandaoyun_client import JianDaoYunClient
 from mcp_jiandaoyun.data_processor import DataProcessor
 
@@ -92,7 +93,7 @@ async def query_jiandaoyun_data(limit: int = 10) -> str:
         }
         
         logger.info(f"查询成功，返回 {len(formatted_data)} 条数据")
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
         
     except Exception as e:
         error_msg = f"查询数据失败: {str(e)}"
@@ -105,7 +106,7 @@ async def query_jiandaoyun_data(limit: int = 10) -> str:
             "data": []
         }
         
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
 
 @mcp.tool()
 async def process_and_save_to_jiandaoyun(original_text: str, custom_marker: str = "[已处理]") -> str:
@@ -152,7 +153,7 @@ async def process_and_save_to_jiandaoyun(original_text: str, custom_marker: str
         }
         
         logger.info("数据处理和保存成功")
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
         
     except Exception as e:
         error_msg = f"处理和保存失败: {str(e)}"
@@ -166,7 +167,7 @@ async def process_and_save_to_jiandaoyun(original_text: str, custom_marker: str
             "custom_marker": custom_marker
         }
         
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False)
 
 @mcp.resource("config://jiandaoyun/settings")
 def get_jiandaoyun_config() -> str:
@@ -242,6 +243,7 @@ def jiandaoyun_workflow_prompt() -> str:
 
 if __name__ == "__main__":
     logger.info("启动标准MCP简道云服务器...")
+    install_uvloop()
     try:
         # 使用stdio传输，符合MCP标准
         mcp.run(transport="stdio")
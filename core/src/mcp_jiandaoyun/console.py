@@ -0,0 +1,38 @@
+"""
+控制台输入模块
+
+为交互式MCP客户端提供不阻塞事件循环的用户输入读取。
+"""
+
+import asyncio
+import threading
+from typing import Optional
+
+async def ainput(prompt: str = "") -> str:
+    """
+    异步读取一行用户输入
+
+    在守护线程中调用input()，等待输入期间事件循环仍可运行后台读取等任务。
+    使用守护线程而不是默认线程池，退出程序时不会因为阻塞在input()上而挂起。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _set_result(result: Optional[str], error: Optional[BaseException]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _read():
+        try:
+            result = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_set_result, None, e)
+        else:
+            loop.call_soon_threadsafe(_set_result, result, None)
+
+    threading.Thread(target=_read, daemon=True).start()
+    return await future
@@ -0,0 +1,28 @@
+"""
+事件循环配置模块
+
+为MCP服务器和客户端脚本提供统一的事件循环策略设置。
+"""
+
+import asyncio
+import sys
+
+def install_uvloop() -> bool:
+    """
+    安装uvloop事件循环策略
+
+    非Windows平台使用uvloop事件循环（由uvicorn[standard]提供），stdio和子进程管道读写更快。
+    FastMCP通过anyio创建事件循环，同样会使用这里设置的策略。
+    Windows平台或未安装uvloop时保持默认事件循环。
+
+    Returns:
+        bool: 是否已切换为uvloop
+    """
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
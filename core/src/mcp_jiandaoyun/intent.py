@@ -0,0 +1,45 @@
+"""
+意图解析模块
+
+客户端脚本用关键词表把用户输入映射为MCP工具调用，这里提供共用的解析逻辑。
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Pattern, Sequence, Tuple
+
+# 用户输入解析用的正则，模块加载时预编译
+NUM_RE = re.compile(r'\d+')
+QUOTED_RE = re.compile(r'[\'\"](.*?)[\'\"]')
+
+# 意图关键词正则到参数提取函数的映射
+IntentTable = Sequence[Tuple[Pattern, Callable[[str], Optional[Dict[str, Any]]]]]
+
+# 解析结果: (动作, 工具名, 参数项)
+ParsedIntent = Tuple[str, Optional[str], Tuple[Tuple[str, Any], ...]]
+
+def make_intent_parser(intent_table: IntentTable) -> Callable[[str], ParsedIntent]:
+    """
+    创建意图解析函数
+
+    解析过程只依赖输入文本，结果按输入缓存，重复的命令直接命中。
+    返回不可变的 (动作, 工具名, 参数项) 元组，避免缓存的结果被调用方修改。
+
+    Args:
+        intent_table: 意图关键词正则到参数提取函数的映射，按顺序匹配
+
+    Returns:
+        带缓存的意图解析函数
+    """
+    @lru_cache(maxsize=256)
+    def parse_intent(user_input: str) -> ParsedIntent:
+        for pattern, build_intent in intent_table:
+            if pattern.search(user_input):
+                intent = build_intent(user_input)
+                if intent is not None:
+                    return intent["action"], intent["tool"], tuple(intent["arguments"].items())
+                break
+
+        return "unknown", None, ()
+
+    return parse_intent
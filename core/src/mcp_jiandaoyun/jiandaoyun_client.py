@@ -41,6 +41,9 @@ from .exceptions import (
 # ==================== 日志配置 ====================
 logger = logging.getLogger(__name__)
 
+# 简道云查询接口单次返回的最大条数，按ID查找时按此大小翻页
+QUERY_PAGE_SIZE = 100
+
 # ==================== 接口定义 ====================
 class IJianDaoYunClient(ABC):
     """
@@ -51,10 +54,15 @@ class IJianDaoYunClient(ABC):
     """
 
     @abstractmethod
-    async def query_image_data(self, limit: int = 10) -> List[Dict[str, Any]]:
+    async def query_image_data(self, limit: int = 10, data_id: str = "") -> List[Dict[str, Any]]:
         """查询包含图片的数据"""
         pass
 
+    @abstractmethod
+    async def query_image_data_by_ids(self, data_ids: List[str]) -> List[Dict[str, Any]]:
+        """按数据ID查询包含图片的数据"""
+        pass
+
     @abstractmethod
     async def create_data(self, source_text: str, result_text: str) -> Dict[str, Any]:
         """创建新的数据记录"""
@@ -113,7 +121,7 @@ class JianDaoYunClient(IJianDaoYunClient):
     
     @retry_on_exception(max_retries=3, delay=1.0)
     @handle_exceptions(reraise=True)
-    async def query_image_data(self, limit: int = 10) -> List[Dict[str, Any]]:
+    async def query_image_data(self, limit: int = 10, data_id: str = "") -> List[Dict[str, Any]]:
         """
         查询包含图片的简道云数据
 
@@ -128,6 +136,7 @@ class JianDaoYunClient(IJianDaoYunClient):
 
         Args:
             limit: 查询数据条数限制，默认10条
+            data_id: 翻页游标，上一页最后一条数据的ID，空表示从第一条开始
 
         Returns:
             List[Dict[str, Any]]: 查询到的数据列表，包含图片URL和识别结果
@@ -151,7 +160,7 @@ class JianDaoYunClient(IJianDaoYunClient):
         request_body = {
             "app_id": self.config.app_id,                             # 应用ID
             "entry_id": self.config.entry_id,                         # 表单ID
-            "data_id": "",                                            # 空表示查询所有记录
+            "data_id": data_id,                                       # 翻页游标，空表示从第一条开始
             "fields": query_fields,                                   # 查询所有相关字段
             "filter": {                                               # 查询过滤条件
                 "rel": "and",                                         # 条件关系：AND
@@ -220,6 +229,38 @@ class JianDaoYunClient(IJianDaoYunClient):
                 cause=e
             )
     
+    async def query_image_data_by_ids(self, data_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        按数据ID查询包含图片的简道云数据
+
+        以data_id游标逐页查询，找到全部请求的数据或数据已查完时停止，
+        请求的记录不受单次查询条数限制。
+
+        Args:
+            data_ids: 数据ID列表
+
+        Returns:
+            List[Dict[str, Any]]: 找到的数据列表，顺序与data_ids一致，未找到的ID不出现在结果中
+        """
+        wanted_ids = set(data_ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        cursor = ""
+        while wanted_ids:
+            page = await self.query_image_data(limit=QUERY_PAGE_SIZE, data_id=cursor)
+            for item in page:
+                item_id = item.get("_id")
+                if item_id in wanted_ids:
+                    wanted_ids.discard(item_id)
+                    found[item_id] = item
+            # 不足一页说明已经查完
+            cursor = page[-1].get("_id", "") if len(page) == QUERY_PAGE_SIZE else ""
+            if not cursor:
+                break
+
+        if wanted_ids:
+            logger.warning(f"⚠️ {len(wanted_ids)} 个数据ID在简道云中不存在")
+        return [found[data_id] for data_id in data_ids if data_id in found]
+
     async def create_data(self, source_text: str, result_text: str) -> Dict[str, Any]:
         """
         创建新的简道云数据记录
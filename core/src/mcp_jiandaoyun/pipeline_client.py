@@ -0,0 +1,341 @@
+"""
+流水线MCP客户端模块
+
+通过stdio以子进程方式连接MCP服务器，请求一次写入、响应由后台任务按ID分发，
+多个请求可以同时在管道中传输。core/clients下的各个客户端脚本在此基础上扩展。
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import sys
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# 子进程stdout的读取缓冲上限，较大的查询结果是单行JSON，默认64KiB不够用
+STREAM_LIMIT = 1 << 20
+
+# 关闭MCP服务器时等待其自行退出的时间（秒）
+SHUTDOWN_TIMEOUT = 1.0
+
+# MCP协议版本
+PROTOCOL_VERSION = "2024-11-05"
+
+class PipelinedMCPClient:
+    """流水线MCP客户端"""
+
+    __slots__ = ("server_command", "process", "_next_id", "_pending", "_reader_task", "_write_lock")
+
+    # initialize握手中上报的客户端信息
+    client_info: Dict[str, str] = {"name": "JianDaoYun Client", "version": "1.0"}
+
+    def __init__(self, server_command: Sequence[str]):
+        """
+        初始化MCP客户端
+
+        Args:
+            server_command: 启动MCP服务器的命令列表
+        """
+        self.server_command = list(server_command)
+        self.process = None
+        # 请求ID计数器
+        self._next_id = itertools.count(1).__next__
+        # 等待响应的请求，按请求ID索引，由后台读取任务完成
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        # 客户端可能被多个代理共享，写入需要串行，避免请求帧交错
+        self._write_lock = asyncio.Lock()
+
+    async def start(self):
+        """启动MCP服务器进程并完成初始化握手"""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.server_command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            # 服务器的stderr没有人读取，不接管道，避免日志写满缓冲区后阻塞服务器
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=STREAM_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._reader_loop())
+
+        await self._initialize()
+
+    async def _initialize(self):
+        """执行MCP初始化握手"""
+        await self._send_request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": self.client_info
+        })
+        # 服务器收到initialized通知后才会处理其他请求
+        await self._write_messages([{"jsonrpc": "2.0", "method": "notifications/initialized"}])
+
+    async def stop(self):
+        """停止MCP服务器进程"""
+        if self.process:
+            # 先关闭stdin让服务器自行退出，超时后再强制结束
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+            self.process = None
+
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+    @property
+    def is_running(self) -> bool:
+        """服务器进程是否仍在运行"""
+        return self.process is not None and self.process.returncode is None
+
+    async def _reader_loop(self):
+        """后台读取响应，按请求ID分发给等待中的请求"""
+        try:
+            while True:
+                response_line = await self.process.stdout.readline()
+                if not response_line:
+                    break
+
+                try:
+                    response = orjson.loads(response_line)
+                except orjson.JSONDecodeError:
+                    logger.warning("无法解析MCP服务器输出: %r", response_line[:200])
+                    continue
+
+                self._deliver(response)
+        finally:
+            self._fail_pending()
+
+    def _deliver(self, response: Any):
+        """把响应交给对应的等待请求，服务器主动发送的通知没有对应的请求，直接忽略"""
+        if isinstance(response, dict):
+            future = self._pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+    def _fail_pending(self):
+        """连接断开时唤醒所有仍在等待的请求"""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("MCP服务器连接已断开"))
+        self._pending.clear()
+
+    async def _write(self, payload: bytes):
+        """写入已编码的消息帧"""
+        async with self._write_lock:
+            self.process.stdin.write(payload)
+            await self.process.stdin.drain()
+
+    async def _write_messages(self, messages: List[Dict]):
+        """把JSON-RPC消息写入服务器，所有消息帧合并为一次写入"""
+        if not messages:
+            return
+        # 逐帧用换行连接，末尾补一个换行，每条消息只有一次编码、没有额外的拼接副本
+        await self._write(b"\n".join(map(orjson.dumps, messages)) + b"\n")
+
+    def _build_request(self, method: str, params: Optional[Dict] = None) -> Dict:
+        """构造JSON-RPC请求"""
+        request = {
+            "jsonrpc": "2.0",
+            "id": self._next_id(),
+            "method": method
+        }
+
+        if params:
+            request["params"] = params
+
+        return request
+
+    async def _roundtrip(self, request_ids: List[int], write: Callable[[], Awaitable[None]]) -> List[Dict]:
+        """
+        登记等待的请求后执行写入，等待全部响应
+
+        Args:
+            request_ids: 写入的请求ID
+            write: 执行写入的无参协程函数
+
+        Returns:
+            与请求ID顺序一致的响应列表
+        """
+        if self._reader_task is None or self._reader_task.done():
+            raise RuntimeError("MCP服务器未启动")
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request_id in request_ids:
+            future = loop.create_future()
+            self._pending[request_id] = future
+            futures.append(future)
+
+        try:
+            await write()
+            responses = await asyncio.gather(*futures)
+        finally:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+
+        for response in responses:
+            if "error" in response:
+                raise RuntimeError(f"MCP错误: {response['error']}")
+
+        return list(responses)
+
+    async def _dispatch(self, requests: List[Dict]) -> List[Dict]:
+        """一次写入多个JSON-RPC请求，等待全部响应"""
+        if not requests:
+            return []
+        return await self._roundtrip(
+            [request["id"] for request in requests],
+            partial(self._write_messages, requests)
+        )
+
+    async def _send_request(self, method: str, params: Optional[Dict] = None) -> Dict:
+        """发送JSON-RPC请求"""
+        responses = await self._dispatch([self._build_request(method, params)])
+        return responses[0]
+
+    async def send_batch(self, calls: List[Tuple[str, Optional[Dict]]]) -> List[Dict]:
+        """
+        流水线发送多个JSON-RPC请求
+
+        所有请求一次写入，不必等上一个响应返回再发下一个，
+        响应由后台读取任务按ID匹配。
+
+        Args:
+            calls: (方法名, 参数) 列表
+
+        Returns:
+            与调用顺序一致的服务器响应列表
+        """
+        return await self._dispatch([self._build_request(method, params) for method, params in calls])
+
+    async def list_tools(self) -> List[Dict]:
+        """获取工具列表"""
+        response = await self._send_request("tools/list")
+        try:
+            return response["result"]["tools"]
+        except KeyError:
+            return []
+
+    async def call_tool(self, name: str, arguments: Optional[Dict] = None) -> str:
+        """
+        调用工具
+
+        Args:
+            name: 工具名称
+            arguments: 工具参数
+
+        Returns:
+            工具结果文本
+        """
+        response = await self._send_request("tools/call", self._tool_params(name, arguments))
+        return self._tool_text(response)
+
+    async def call_tools_batch(self, calls: List[Tuple[str, Optional[Dict]]]) -> List[str]:
+        """
+        批量调用工具
+
+        Args:
+            calls: (工具名称, 参数) 列表
+
+        Returns:
+            与调用顺序一致的工具结果文本列表
+        """
+        responses = await self.send_batch([
+            ("tools/call", self._tool_params(name, arguments)) for name, arguments in calls
+        ])
+        return [self._tool_text(response) for response in responses]
+
+    @staticmethod
+    def _tool_params(name: str, arguments: Optional[Dict]) -> Dict[str, Any]:
+        """构造tools/call请求参数"""
+        params = {"name": name}
+        if arguments:
+            params["arguments"] = arguments
+        return params
+
+    @staticmethod
+    def _tool_text(response: Dict[str, Any]) -> str:
+        """提取工具调用结果中的文本内容"""
+        # 符合规范的响应直接取第一个内容的文本，不构造默认值
+        try:
+            return response["result"]["content"][0]["text"]
+        except (KeyError, IndexError):
+            pass
+
+        result = response.get("result", {})
+        content = result.get("content", [])
+
+        if content:
+            return content[0].get("text", "")
+
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+class ScriptMCPClient(PipelinedMCPClient):
+    """用当前Python解释器运行服务器脚本的MCP客户端"""
+
+    __slots__ = ("server_script",)
+
+    def __init__(self, server_script: str):
+        super().__init__([sys.executable, server_script])
+        self.server_script = server_script
+
+class MCPSessionPool:
+    """
+    MCP客户端连接池
+
+    按服务器标识复用已初始化的MCP客户端，多个代理共享同一个服务器进程，
+    不再为每个代理启动子进程并重新执行initialize握手。
+    """
+
+    __slots__ = ("_clients", "_locks")
+
+    def __init__(self):
+        self._clients: Dict[Hashable, PipelinedMCPClient] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    async def _connect(self, key: Hashable) -> PipelinedMCPClient:
+        """
+        启动一个新的MCP客户端
+
+        Args:
+            key: 服务器启动命令（元组）
+
+        Returns:
+            已启动并完成初始化的MCP客户端
+        """
+        client = PipelinedMCPClient(key)
+        await client.start()
+        return client
+
+    async def acquire(self, key: Hashable) -> PipelinedMCPClient:
+        """获取共享的MCP客户端，服务器未运行时启动"""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            client = self._clients.get(key)
+            if client is None or not client.is_running:
+                client = await self._connect(key)
+                self._clients[key] = client
+            return client
+
+    async def close_all(self):
+        """停止池中所有MCP服务器"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.stop()
+            except Exception as e:
+                logger.warning(f"停止MCP服务器失败: {e}")
@@ -12,17 +12,17 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from core.clients.mcp_client_final import QwenMCPAgent, SimpleMCPClient
+from core.clients.mcp_client_final import QwenMCPAgent, MCPSessionPool
 
 async def interactive_demo():
     """交互式演示"""
     print("🎮 MCP交互式演示")
     print("=" * 50)
     
-    # 创建MCP客户端和代理
+    # 创建代理，MCP客户端由连接池提供
     server_script = os.path.join(project_root, "core/servers/mcp_server_final.py")
-    mcp_client = SimpleMCPClient(server_script)
-    agent = QwenMCPAgent(mcp_client)
+    pool = MCPSessionPool()
+    agent = QwenMCPAgent(server_script, pool)
     
     try:
         print("正在启动MCP服务器...")
@@ -68,6 +68,7 @@ async def interactive_demo():
     finally:
         # 清理资源
         await agent.shutdown()
+        await pool.close_all()
         print("🔚 演示结束")
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+"""
+AIResponseCache 单元测试
+
+覆盖LRU淘汰、TTL过期和缓存键生成。
+"""
+
+from api_server.providers import ai_cache
+from api_server.providers.ai_cache import AIResponseCache
+
+def test_evicts_least_recently_used_entry():
+    """超出maxsize时淘汰最久未使用的条目，读取会刷新使用顺序"""
+    cache = AIResponseCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a变为最近使用
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["size"] == 2
+
+def test_expired_entry_is_dropped(monkeypatch):
+    """过期条目读取时返回None并被删除"""
+    now = [1000.0]
+    monkeypatch.setattr(ai_cache.time, "monotonic", lambda: now[0])
+
+    cache = AIResponseCache(maxsize=10, ttl=5)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    now[0] += 6
+    assert cache.get("key") is None
+    assert cache.stats()["size"] == 0
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_make_key_separates_fields():
+    """不同的字段拆分不会得到相同的缓存键"""
+    assert AIResponseCache.make_key("m", "ab", "c") != AIResponseCache.make_key("m", "a", "bc")
+    assert AIResponseCache.make_key("m", None, "p") == AIResponseCache.make_key("m", "", "p")
@@ -0,0 +1,159 @@
+"""
+AIProcessorService 单元测试
+
+使用内存中的MCP客户端替身，不启动MCP服务器，也不调用AI模型。
+"""
+
+import pytest
+
+from api_server.models.models import (
+    AIProcessResult, ProcessStatus, VisionResult, VisionResultType
+)
+from api_server.services.ai_processor import AIProcessorService
+
+class FakeMCPClient:
+    """记录调用次数的MCP客户端替身"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+
+    async def get_record(self, record_id):
+        records = await self.get_records([record_id])
+        return records[record_id]
+
+    async def get_records(self, record_ids):
+        return {
+            record_id: {"success": True, "data": self.rows[record_id]}
+            if record_id in self.rows
+            else {"success": False, "error": f"未找到记录: {record_id}"}
+            for record_id in record_ids
+        }
+
+    async def update_record(self, record_id, updates):
+        self.updates.append((record_id, updates))
+        return {"success": True, "record_id": record_id}
+
+@pytest.fixture
+def make_service():
+    """创建使用替身MCP客户端、识别和AI处理均为本地桩函数的服务"""
+
+    def _make(rows):
+        service = AIProcessorService()
+        service.mcp_client = FakeMCPClient(rows)
+        service.vision_calls = 0
+
+        async def fake_vision(record_data):
+            service.vision_calls += 1
+            return VisionResult(
+                type=VisionResultType.DOCUMENT_ANALYSIS,
+                content=f"识别: {record_data['source_text']}",
+                confidence=0.9,
+                processing_time=0.01
+            )
+
+        async def fake_ai(vision_result, original_text):
+            return AIProcessResult(
+                original_text=original_text,
+                processed_text=f"处理: {original_text}",
+                ai_analysis="ok",
+                confidence=0.9,
+                processing_time=0.01
+            )
+
+        service._process_vision = fake_vision
+        service._process_ai = fake_ai
+        return service
+
+    return _make
+
+@pytest.mark.asyncio
+async def test_same_source_text_hits_result_cache(make_service):
+    """输入相同的第二条记录命中结果缓存，不再识别，但仍然回写"""
+    service = make_service({
+        "r1": {"source_text": "相同文本", "result_text": ""},
+        "r2": {"source_text": "相同文本", "result_text": ""}
+    })
+    assert service.result_cache is not None
+
+    first = await service.process_record("r1")
+    second = await service.process_record("r2")
+
+    assert first.status == second.status == ProcessStatus.SUCCESS
+    assert second.ai_result.processed_text == first.ai_result.processed_text
+    assert service.vision_calls == 1
+    assert [record_id for record_id, _ in service.mcp_client.updates] == ["r1", "r2"]
+
+@pytest.mark.asyncio
+async def test_same_text_with_different_image_is_not_shared(make_service):
+    """源文本相同但图像不同的记录不共用缓存结果"""
+    service = make_service({
+        "r1": {"source_text": "相同文本", "image_url": "a.jpg", "result_text": ""},
+        "r2": {"source_text": "相同文本", "image_url": "b.jpg", "result_text": ""}
+    })
+
+    await service.process_record("r1")
+    await service.process_record("r2")
+
+    assert service.vision_calls == 2
+
+@pytest.mark.asyncio
+async def test_processed_record_is_skipped_with_stored_result(make_service):
+    """已有处理结果的记录直接跳过，返回记录中保存的结果"""
+    service = make_service({"r1": {"source_text": "原文", "result_text": "已保存的结果"}})
+
+    result = await service.process_record("r1")
+
+    assert result.status == ProcessStatus.SKIPPED
+    assert result.success
+    assert result.ai_result.processed_text == "已保存的结果"
+    assert service.vision_calls == 0
+    assert service.mcp_client.updates == []
+
+@pytest.mark.asyncio
+async def test_force_reprocess_ignores_stored_result(make_service):
+    """强制重新处理时不跳过已有处理结果的记录"""
+    service = make_service({"r1": {"source_text": "原文", "result_text": "已保存的结果"}})
+
+    result = await service.process_record("r1", force_reprocess=True)
+
+    assert result.status == ProcessStatus.SUCCESS
+    assert result.ai_result.processed_text == "处理: 原文"
+    assert len(service.mcp_client.updates) == 1
+
+@pytest.mark.asyncio
+async def test_batch_process_forwards_force_reprocess(make_service):
+    """批量处理把force_reprocess传给每条记录"""
+    rows = {"r1": {"source_text": "原文", "result_text": "已保存的结果"}}
+
+    skipped = await make_service(rows).batch_process(["r1"])
+    reprocessed = await make_service(rows).batch_process(["r1"], force_reprocess=True)
+
+    assert skipped["skipped_count"] == 1
+    assert reprocessed["success_count"] == 1
+
+@pytest.mark.asyncio
+async def test_batch_process_turns_exception_into_failed_result(make_service):
+    """单条记录抛出异常时转换为失败结果，不影响同批其他记录"""
+    service = make_service({
+        "ok": {"source_text": "正常", "result_text": ""},
+        "bad": {"source_text": "异常", "result_text": ""}
+    })
+    process_record = service.process_record
+
+    async def flaky_process_record(record_id, **kwargs):
+        if record_id == "bad":
+            raise RuntimeError("boom")
+        return await process_record(record_id, **kwargs)
+
+    service.process_record = flaky_process_record
+
+    result = await service.batch_process(["ok", "bad"])
+
+    assert result["success_count"] == 1
+    assert result["failed_count"] == 1
+    ok_result, bad_result = result["results"]
+    assert ok_result.status == ProcessStatus.SUCCESS
+    assert bad_result.record_id == "bad"
+    assert bad_result.status == ProcessStatus.FAILED
+    assert "boom" in bad_result.error_message
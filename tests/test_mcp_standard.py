@@ -8,7 +8,7 @@ import asyncio
 import json
 import sys
 import os
-from mcp_client_standard import MCPClient, QwenMCPAgent
+from mcp_client_standard import MCPClient, MCPSessionPool, QwenMCPAgent
 
 async def test_mcp_server():
     """测试MCP服务器功能"""
@@ -82,8 +82,8 @@ async def test_qwen_agent():
     print("\n🤖 开始测试Qwen MCP代理...")
     
     server_command = [sys.executable, "mcp_server_standard.py"]
-    mcp_client = MCPClient(server_command)
-    agent = QwenMCPAgent(mcp_client)
+    pool = MCPSessionPool()
+    agent = QwenMCPAgent(server_command, pool)
     
     try:
         await agent.initialize()
@@ -110,6 +110,7 @@ async def test_qwen_agent():
     
     finally:
         await agent.shutdown()
+        await pool.close_all()
 
 async def main():
     """主测试函数"""